@@ -1,119 +1,40 @@
-import os
-import cv2
 import time
-import re
+_startup = time.perf_counter()
+
+import queue
 import threading
 
 # import speech_recognition as sr
 import speech_recognition as sr
-import spacy
 # from googletrans import Translator
-from deep_translator import GoogleTranslator
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox, LabelFrame
-from PIL import Image, ImageTk
-
-# Load spaCy English model
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    print("⚠ Please run: python -m spacy download en_core_web_sm")
-    exit()
+from tkinter import ttk, scrolledtext, messagebox
+from video_index import get_index
+from isl_core import LANGUAGE_MAP, get_video_sequence, isl_gloss_spacy, preprocess
+from nlp_loader import report_startup
+from frame_cache import get_frame_cache
+from pipeline import SourceIdle, SpeechPipeline
+from recognizers import get_recognizer, pipeline_callables
+from translation import Translator
+from metrics import metrics, serve_metrics
+from partial_gloss import PartialSigner
+from tk_player import TkPlayer
+from warm_cache import warm_start
 
 recognizer = sr.Recognizer()
-# translator = Translator()
-
-language_map = {
-    "English": "en-IN",
-    "Tamil": "ta-IN",
-    "Telugu": "te-IN",
-    "Hindi": "hi-IN"
-}
-
-def preprocess(text):
-    return re.sub(r'[^\w\s]', '', text.lower())
-
-def isl_gloss_spacy(text):
-    doc = nlp(text)
-    important_words = []
-    tense_marker = ""
-
-    keep_words = {"left", "right", "back", "forward", "up", "down", "near", "on", "in", "under", "to", "from"}
-
-    for token in doc:
-        if token.text.lower() in keep_words:
-            important_words.append(token.text.lower())
-        elif token.pos_ == "AUX" and token.lemma_ == "will":
-            tense_marker = "FUTURE"
-        elif token.pos_ in {"AUX", "DET", "ADP"}:
-            continue
-        elif token.tag_ in {"VBD", "VBN"}:
-            tense_marker = "PAST"
-            important_words.append(token.lemma_)
-        else:
-            important_words.append(token.lemma_)
-
-    if tense_marker:
-        important_words.append(tense_marker)
-
-    return ' '.join(important_words).lower()
+# Google by default; set ISL_RECOGNIZER=vosk for offline recognition
+speech_backend = get_recognizer(recognizer=recognizer)
+# English passes through; other languages hit the on-disk cache before Google
+translator = Translator()
 
-def get_video_sequence(gloss_sentence, base_dir='datasets'):
-    full_word_dir = os.path.join(base_dir, 'full_word_videos')
-    letter_dir = os.path.join(base_dir, 'letters')
-    video_sequence = []
+# Index and gloss memo from the last run (rescanned if the dataset changed)
+warm_start('datasets', posters=False)
+# Scan the dataset once at startup; watchdog (if installed) keeps it fresh
+video_index = get_index('datasets')
+video_index.watch()
+frame_cache = get_frame_cache()
 
-    for word in gloss_sentence.lower().split():
-        word_video = os.path.join(full_word_dir, f"{word}.mp4")
-        if os.path.exists(word_video):
-            video_sequence.append(word_video)
-        else:
-            letters_found = []
-            for letter in word:
-                letter_video = os.path.join(letter_dir, f"{letter}.mp4")
-                if os.path.exists(letter_video):
-                    letters_found.append(letter_video)
-                else:
-                    letters_found = []
-                    break
-            if letters_found:
-                video_sequence.extend(letters_found)
-
-    return video_sequence
-
-def play_video_sequence_tk(video_paths, video_label):
-    def update_frame(cap, video_label, remaining_paths):
-        ret, frame = cap.read()
-        if ret:
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(frame)
-            imgtk = ImageTk.PhotoImage(image=img)
-            video_label.imgtk = imgtk
-            video_label.config(image=imgtk)
-            delay = int(1000 / cap.get(cv2.CAP_PROP_FPS)) if cap.get(cv2.CAP_PROP_FPS) > 0 else 40
-            video_label.after(delay, update_frame, cap, video_label, remaining_paths)
-        else:
-            cap.release()
-            time.sleep(0.2)
-            if remaining_paths:
-                next_video = remaining_paths[0]
-                remaining_paths = remaining_paths[1:]
-                cap_next = cv2.VideoCapture(next_video)
-                if cap_next.isOpened():
-                    update_frame(cap_next, video_label, remaining_paths)
-                else:
-                    print(f"Error: Could not open {next_video}")
-            else:
-                print("Video sequence finished.")
-
-    if video_paths:
-        first_video = video_paths[0]
-        remaining_paths = video_paths[1:]
-        cap = cv2.VideoCapture(first_video)
-        if cap.isOpened():
-            update_frame(cap, video_label, remaining_paths)
-        else:
-            print(f"Error: Could not open {first_video}")
+language_map = LANGUAGE_MAP
 
 class ISLApp(tk.Tk):
     def __init__(self):
@@ -127,9 +48,29 @@ class ISLApp(tk.Tk):
         self.listener_thread = None
         self.stop_flag = {"stop": False}
         self.current_gloss = tk.StringVar()
-        self.video_playing = False
+        self.phrase_count = 0
+        self.streaming_signs = False
+        # Listener threads never touch Tk; they queue calls for the main thread
+        self.ui_calls = queue.Queue()
 
         self.create_widgets()
+        # Decodes on its own thread, blits from Tk `after` ticks; new
+        # sequences wait or preempt according to ISL_TK_POLICY
+        self.player = TkPlayer(self.video_output, loader=frame_cache.get,
+                               log=lambda msg: self.call_in_ui(self.log, msg)).start()
+        self.after(30, self.drain_ui_calls)
+
+    def call_in_ui(self, fn, *args):
+        self.ui_calls.put((fn, args))
+
+    def drain_ui_calls(self):
+        try:
+            while True:
+                fn, args = self.ui_calls.get_nowait()
+                fn(*args)
+        except queue.Empty:
+            pass
+        self.after(30, self.drain_ui_calls)
 
     def create_widgets(self):
         # Language selection
@@ -192,55 +133,98 @@ class ISLApp(tk.Tk):
         self.start_btn.config(state=tk.NORMAL)
         self.stop_btn.config(state=tk.DISABLED)
         self.log("⏹ Stopped listening.")
+        self.log_metrics()
         self.is_listening = False
 
+    def log_metrics(self):
+        for line in metrics.summary_lines():
+            self.log(f"📊 {line}")
+
+    def on_partial(self, text, signer=None):
+        self.call_in_ui(self.current_gloss.set, f"… {text}")
+        if signer is not None:
+            signer.on_partial(text)
+
     def continuous_listen(self, lang_code, base_dir='datasets'):
+        # With a streaming recognizer, English phrases are signed word by word
+        # from the partial transcripts instead of after the whole phrase
+        signer = None
+        if speech_backend.streaming and lang_code.startswith("en"):
+            signer = PartialSigner(base_dir=base_dir, loader=frame_cache.get,
+                                   on_gloss=lambda words, videos: self.call_in_ui(self.log, f"🤟 {' '.join(words)}"))
+            self.player.play_stream(signer.clips)
+        self.streaming_signs = signer is not None
         with sr.Microphone() as source:
             recognizer.adjust_for_ambient_noise(source)
-            while not self.stop_flag["stop"]:
-                try:
-                    audio = recognizer.listen(source, timeout=1, phrase_time_limit=3)
-                    recognized = recognizer.recognize_google(audio, language=lang_code)
-                    self.log(f"🗣 Recognized: {recognized}")
-
-                    # src = lang_code.split('-')[0]
-                    # translated = translator.translate(recognized, src=src, dest="en")
-                    translated_text = GoogleTranslator(source='auto', target='en').translate(recognized)
-                    self.log(f"🌐 Translated: {translated_text}")
-
-                    processed = preprocess(translated_text)
-                    gloss = isl_gloss_spacy(processed)
-                    self.log(f"📝 ISL Gloss: {gloss}")
-                    self.current_gloss.set(gloss)
-
-                    sequence = get_video_sequence(gloss, base_dir=base_dir)
-                    if sequence and not self.video_playing:
-                        self.log(f"▶ Playing video sequence for gloss...")
-                        self.video_playing = True
-                        # Play video in the Tkinter label using the updated function
-                        threading.Thread(target=play_video_sequence_tk, args=(list(sequence), self.video_output), daemon=True).start()
-                    elif not sequence:
-                        self.log("⚠ No matching videos found for gloss.")
-
-                except sr.WaitTimeoutError:
-                    continue
-                except sr.UnknownValueError:
-                    self.log("🤷 Couldn't understand.")
-                except sr.RequestError as e:
-                    self.log(f"⚠ API error: {e}")
-                except Exception as e:
-                    self.log(f"💥 Unexpected error: {e}")
-                finally:
-                    self.video_playing = False
+            # The microphone keeps being read while earlier phrases are
+            # recognized, translated and glossed on the pipeline's threads.
+            listen, recognize = pipeline_callables(
+                speech_backend, recognizer, source, lang_code, phrase_time_limit=3,
+                on_partial=lambda text: self.on_partial(text, signer))
+            if signer is not None:
+                listen = signer.wrap_listen(listen)
+            pipeline = SpeechPipeline(
+                listen=listen,
+                recognize=recognize,
+                translate=lambda text: translator.translate(text, lang_code),
+                gloss=lambda text: isl_gloss_spacy(preprocess(text)),
+                sequence=lambda gloss: get_video_sequence(gloss, base_dir=base_dir),
+                idle_exceptions=(sr.WaitTimeoutError, SourceIdle),
+            ).start()
+            try:
+                while not self.stop_flag["stop"]:
+                    phrase = pipeline.get(timeout=0.5)
+                    if phrase is not None:
+                        self.call_in_ui(self.handle_phrase, phrase)
+            finally:
+                pipeline.stop()
+                if signer is not None:
+                    signer.close()
+                if pipeline.dropped:
+                    self.call_in_ui(self.log, f"⚠ Dropped {pipeline.dropped} phrase(s) while busy.")
+
+    def handle_phrase(self, phrase):
+        try:
+            if phrase.error is not None:
+                raise phrase.error
+            self.log(f"🗣 Recognized: {phrase.recognized}")
+            self.log(f"🌐 Translated: {phrase.translated}")
+            self.log(f"📝 ISL Gloss: {phrase.gloss}")
+            self.log("⏱ " + " · ".join(f"{name} {secs:.2f}s" for name, secs in phrase.timings.items()))
+            self.phrase_count += 1
+            if self.phrase_count % 10 == 0:
+                self.log_metrics()
+            self.current_gloss.set(phrase.gloss)
+
+            sequence = phrase.sequence
+            # In partial gloss mode the clips were already queued word by word
+            if sequence and not self.streaming_signs:
+                self.log(f"▶ Playing video sequence for gloss...")
+                on_first_frame = lambda: metrics.first_frame(phrase.captured_at, phrase.finished_at)
+                self.player.play(list(sequence), on_first_frame)
+            elif not sequence:
+                self.log("⚠ No matching videos found for gloss.")
+
+        except sr.UnknownValueError:
+            self.log("🤷 Couldn't understand.")
+        except sr.RequestError as e:
+            self.log(f"⚠ API error: {e}")
+        except Exception as e:
+            self.log(f"💥 Unexpected error: {e}")
 
     def on_close(self):
         if self.is_listening:
             if messagebox.askokcancel("Quit", "Listening is active. Stop and quit?"):
                 self.stop_flag["stop"] = True
+                self.player.stop()
                 self.destroy()
         else:
+            self.player.stop()
             self.destroy()
 
 if __name__ == "__main__":
+    report_startup("app.py", _startup)
+    # Set ISL_METRICS_PORT to expose /metrics and /metrics.json
+    serve_metrics()
     app = ISLApp()
     app.mainloop()
\ No newline at end of file
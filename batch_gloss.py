@@ -0,0 +1,58 @@
+import argparse
+import json
+import sys
+import time
+
+from isl_gloss import gloss_texts
+from isl_core import get_video_sequence
+
+
+def iter_lines(stream):
+    for line in stream:
+        yield line.rstrip("\r\n")
+
+
+def run(input_stream, output_stream, batch_size=1000, n_process=1, base_dir='datasets', partial_spelling=False):
+    # One JSON object per input line, in input order
+    count = 0
+    for text, gloss in gloss_texts(iter_lines(input_stream), batch_size=batch_size, n_process=n_process):
+        record = {
+            "line": count + 1,
+            "text": text,
+            "gloss": gloss,
+            "videos": get_video_sequence(gloss, base_dir=base_dir, partial_spelling=partial_spelling),
+        }
+        output_stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m batch_gloss",
+                                     description="Gloss a text file line by line and emit gloss + video sequence as JSONL.")
+    parser.add_argument("input", nargs="?", default="-", help="text file, one sentence per line (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--n-process", type=int, default=1)
+    parser.add_argument("--base-dir", default="datasets")
+    parser.add_argument("--partial-spelling", action="store_true",
+                        help="keep known letters of words that cannot be fully fingerspelled")
+    args = parser.parse_args(argv)
+
+    input_stream = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output_stream = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    start = time.perf_counter()
+    try:
+        count = run(input_stream, output_stream, args.batch_size, args.n_process, args.base_dir, args.partial_spelling)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+    elapsed = time.perf_counter() - start
+    print(f"📝 Glossed {count} lines in {elapsed:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
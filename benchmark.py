@@ -0,0 +1,309 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+CORPUS = os.path.join("benchmarks", "sentences.txt")
+DEFAULT_OUTPUT = os.path.join("benchmarks", "results.json")
+DEFAULT_BASELINE = os.path.join("benchmarks", "baseline.json")
+DEFAULT_TOLERANCE = 0.20
+# Timed loops are repeated and the fastest round kept; slower rounds are
+# scheduler and cache noise, not the code
+ROUNDS = 7
+# Results of a millisecond or less per call still move by tens of percent
+# between runs on a busy machine; they only fail the check when they double
+NOISY_TOLERANCE = 1.0
+
+# Long out-of-vocabulary words that force letter-by-letter fallback
+FINGERSPELL_WORDS = ["praveenraj", "chennai", "hyderabad", "coimbatore", "thiruvananthapuram", "2024"]
+
+
+def load_corpus(path=CORPUS):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def result(value, unit, higher_is_better, tolerance=None):
+    # tolerance: per-result override for values too small to time tightly
+    entry = {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+    if tolerance is not None:
+        entry["tolerance"] = tolerance
+    return entry
+
+
+def best_of(fn, rounds=ROUNDS):
+    # Seconds taken by the fastest of several runs of fn()
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def bench_gloss(corpus, repeat=5):
+    # Raw spaCy + gloss rules; the memo cache is bypassed on purpose
+    from isl_gloss import gloss_doc, gloss_texts, preprocess
+    from nlp_loader import get_nlp
+
+    nlp = get_nlp()
+    texts = [preprocess(text) for text in corpus]
+    gloss_doc(nlp(texts[0]))  # warm-up
+
+    per_sentence = []
+
+    def single_pass():
+        for text in texts:
+            t0 = time.perf_counter()
+            gloss_doc(nlp(text))
+            per_sentence.append(time.perf_counter() - t0)
+    single = len(texts) / best_of(single_pass, repeat)
+
+    def batched_pass():
+        for _ in gloss_texts(corpus, batch_size=256, nlp=nlp):
+            pass
+    batched = len(texts) / best_of(batched_pass, repeat)
+
+    return {
+        "gloss.sentences_per_sec": result(single, "sentences/s", True),
+        "gloss.p50_ms": result(percentile(per_sentence, 50) * 1000, "ms", False),
+        "gloss.p95_ms": result(percentile(per_sentence, 95) * 1000, "ms", False),
+        "gloss.batched_sentences_per_sec": result(batched, "sentences/s", True),
+    }
+
+
+def bench_lookup(corpus, repeat=200):
+    from isl_gloss import preprocess
+    from video_index import VideoIndex, get_video_sequence
+
+    # One scan is well under a millisecond; the median of many is reported
+    builds = []
+    for _ in range(25):
+        start = time.perf_counter()
+        VideoIndex()
+        builds.append(time.perf_counter() - start)
+    index_build = statistics.median(builds)
+
+    glosses = [preprocess(text) for text in corpus]
+    spelled = [" ".join(FINGERSPELL_WORDS[i:] + FINGERSPELL_WORDS[:i]) for i in range(len(FINGERSPELL_WORDS))]
+    get_video_sequence(glosses[0])  # builds the shared index
+
+    out = {"lookup.index_build_ms": result(index_build * 1000, "ms", False, tolerance=NOISY_TOLERANCE)}
+    for name, inputs in (("sentence", glosses), ("fingerspell", spelled)):
+        def run(inputs=inputs):
+            for _ in range(repeat):
+                for gloss in inputs:
+                    get_video_sequence(gloss)
+        out[f"lookup.{name}_us"] = result(best_of(run) / (repeat * len(inputs)) * 1e6, "us/call", False,
+                                            tolerance=NOISY_TOLERANCE)
+
+    # Same sentences through the shared gloss -> sequence cache (warm)
+    from sequence_cache import SequenceCache
+    cache = SequenceCache()
+    for gloss in glosses:
+        cache.get(gloss)
+
+    def cached():
+        for _ in range(repeat):
+            for gloss in glosses:
+                cache.get(gloss)
+    out["lookup.cached_us"] = result(best_of(cached) / (repeat * len(glosses)) * 1e6, "us/call", False,
+                                       tolerance=NOISY_TOLERANCE)
+    return out
+
+
+def bench_decode(base_dir='datasets', limit=None, rounds=3):
+    # Per-frame cost of reading + BGR->RGB conversion straight from the MP4s
+    import cv2
+    from video_index import VideoIndex
+
+    index = VideoIndex(base_dir)
+    paths = sorted(index.letters.values()) + sorted(index.words.values())
+    if limit:
+        paths = paths[:limit]
+
+    # Each stage keeps its fastest pass over the clips
+    read_time = convert_time = float("inf")
+    for _ in range(rounds):
+        frames = 0
+        read_round = convert_round = 0.0
+        for path in paths:
+            cap = cv2.VideoCapture(path)
+            while True:
+                t0 = time.perf_counter()
+                ret, frame = cap.read()
+                t1 = time.perf_counter()
+                if not ret:
+                    break
+                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                t2 = time.perf_counter()
+                read_round += t1 - t0
+                convert_round += t2 - t1
+                frames += 1
+            cap.release()
+        read_time = min(read_time, read_round)
+        convert_time = min(convert_time, convert_round)
+    frames = max(frames, 1)
+    return {
+        "decode.read_us_per_frame": result(read_time / frames * 1e6, "us/frame", False),
+        "decode.cvtcolor_us_per_frame": result(convert_time / frames * 1e6, "us/frame", False),
+        "decode.frames_per_sec": result(frames / (read_time + convert_time or 1e-9), "frames/s", True),
+    }
+
+
+def bench_pipeline(corpus, network_delay=0.05):
+    # Full listen -> recognize -> translate -> gloss -> sequence with stubbed network stages
+    from isl_gloss import gloss_doc, preprocess
+    from metrics import Metrics
+    from nlp_loader import get_nlp
+    from pipeline import ScriptedSource, SpeechPipeline
+    from recognizers import StubRecognizer
+    from translation import DictionaryTranslator
+    from video_index import get_video_sequence
+
+    nlp = get_nlp()
+    source = ScriptedSource(corpus, interval=network_delay * 2)
+    pipeline = SpeechPipeline(
+        listen=source.listen,
+        recognize=StubRecognizer(delay=network_delay).recognize,
+        translate=DictionaryTranslator({}, delay=network_delay).translate,
+        gloss=lambda text: gloss_doc(nlp(preprocess(text))),
+        sequence=get_video_sequence,
+        queue_size=len(corpus),
+        metrics=Metrics(),
+    ).start()
+    latencies = []
+    try:
+        for _ in corpus:
+            phrase = pipeline.get(timeout=30)
+            if phrase is None:
+                break
+            if phrase.error is None:
+                latencies.append(phrase.latency)
+    finally:
+        pipeline.stop()
+    overhead = [latency - 2 * network_delay for latency in latencies]
+    return {
+        "pipeline.p50_ms": result(percentile(latencies, 50) * 1000, "ms", False),
+        "pipeline.p95_ms": result(percentile(latencies, 95) * 1000, "ms", False),
+        "pipeline.overhead_p50_ms": result(statistics.median(overhead) * 1000, "ms", False,
+                                           tolerance=NOISY_TOLERANCE),
+    }
+
+
+SUITES = {
+    "gloss": lambda args, corpus: bench_gloss(corpus),
+    "lookup": lambda args, corpus: bench_lookup(corpus),
+    "decode": lambda args, corpus: bench_decode(args.base_dir, args.decode_limit),
+    "pipeline": lambda args, corpus: bench_pipeline(corpus),
+}
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE, suites=None):
+    # Returns a list of (name, baseline value, current value, change) that got
+    # worse than the tolerance allows; a result the baseline has but this run
+    # lacks comes back with None as the current value and change. suites:
+    # the suites that were run (default all)
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        if suites is not None and name.split(".")[0] not in suites:
+            continue
+        current = results.get(name)
+        if current is None:
+            regressions.append((name, base["value"], None, None))
+            continue
+        if not base["value"]:
+            continue
+        change = (current["value"] - base["value"]) / base["value"]
+        worse = -change if base["higher_is_better"] else change
+        if worse > max(tolerance, base.get("tolerance", 0)):
+            regressions.append((name, base["value"], current["value"], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmark",
+                                     description="Offline benchmarks for the gloss, lookup, decode and pipeline hot paths.")
+    parser.add_argument("--only", default=",".join(SUITES), help="comma-separated suites to run")
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--base-dir", default="datasets")
+    parser.add_argument("--decode-limit", type=int, default=None, help="decode only the first N clips")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative slowdown before a result counts as a regression")
+    parser.add_argument("--save-baseline", action="store_true", help="record these results as the new baseline")
+    parser.add_argument("--allow-partial", action="store_true",
+                        help="save a baseline even though some suites were skipped")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    results = {}
+    skipped = {}
+    suites = [name.strip() for name in args.only.split(",")]
+    for name in suites:
+        if name not in SUITES:
+            parser.error(f"unknown suite {name!r}")
+        print(f"⏱ Running {name}...", file=sys.stderr)
+        try:
+            results.update(SUITES[name](args, corpus))
+        except (ImportError, OSError) as e:
+            # e.g. no spaCy model or OpenCV here; recorded instead of failing the run
+            skipped[name] = str(e)
+            print(f"⚠ Skipped {name}: {e}", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus_sentences": len(corpus),
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    for name, entry in sorted(results.items()):
+        print(f"{name:38s} {entry['value']:12.2f} {entry['unit']}")
+
+    if args.save_baseline:
+        if skipped and not args.allow_partial:
+            print(f"❌ Not saving a baseline without {', '.join(skipped)}; fix the skipped suites "
+                  f"or pass --allow-partial")
+            return 1
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠ No baseline at {args.baseline}; record one with --save-baseline")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance, suites)
+    for name, before, after, change in regressions:
+        if after is None:
+            print(f"❌ {name}: in the baseline but not measured in this run")
+        else:
+            print(f"❌ {name}: {before:.2f} -> {after:.2f} ({change:+.0%})")
+    for name in sorted(set(suites) - {key.split(".")[0] for key in baseline.get("results", {})}):
+        print(f"⚠ The baseline has no {name} results; it is not checked")
+    if regressions:
+        return 1
+    print(f"✅ No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from frame_cache import get_frame_cache
+from video_index import file_signature
+
+DEFAULT_CACHE_DIR = os.environ.get("ISL_SENTENCE_CACHE", os.path.join(".cache", "sentences"))
+DEFAULT_MAX_FILES = 500
+
+# Tried in order; browsers play H.264 and VP8, mp4v is only a last resort
+CODECS = [
+    (".mp4", "avc1", "video/mp4"),
+    (".webm", "VP80", "video/webm"),
+    (".mp4", "mp4v", "video/mp4"),
+]
+
+
+def write_sentence(key, clips, cache_dir):
+    # Encodes the clips back to back into cache_dir/<key>.<ext>; returns
+    # (path, mime type)
+    out_fps = clips[0].fps or 25.0
+    height, width = clips[0].frames.shape[1:3]
+
+    for ext, fourcc, mime in CODECS:
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix="tmp-", suffix=ext)
+        os.close(fd)
+        writer = cv2.VideoWriter(tmp_path, cv2.VideoWriter_fourcc(*fourcc), out_fps, (width, height))
+        if writer.isOpened():
+            break
+        writer.release()
+        os.unlink(tmp_path)
+    else:
+        raise RuntimeError("No usable video codec found for sentence composition")
+
+    try:
+        for clip in clips:
+            # Resample each clip to the output rate so signs keep their speed
+            step = (clip.fps or out_fps) / out_fps
+            for i in np.arange(0, len(clip.frames), step).astype(int):
+                frame = clip.frames[i]
+                if frame.shape[:2] != (height, width):
+                    frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+                writer.write(cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR if frame.ndim == 2 else cv2.COLOR_RGB2BGR))
+    finally:
+        writer.release()
+
+    path = os.path.join(cache_dir, key + ext)
+    os.replace(tmp_path, path)
+    return path, mime
+
+
+class SentenceCompositor:
+    # Stitches the clips of a gloss into one video file on a worker pool.
+    # Files are named by a hash of their inputs (clip paths with each clip's
+    # mtime and size, and the display tier), so a repeated gloss is served
+    # from disk without composing again and a replaced clip is not.
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, workers=2, frame_cache=None, max_files=DEFAULT_MAX_FILES,
+                 executor=None, pool=None):
+        self.cache_dir = cache_dir
+        self.pool = pool
+        self.max_files = max_files
+        self.frame_cache = frame_cache or get_frame_cache()
+        self.executor = executor or ThreadPoolExecutor(max_workers=workers, thread_name_prefix="compose")
+        self._pending = {}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, video_paths):
+        clips = [[path, file_signature(path)] for path in video_paths]
+        payload = json.dumps([clips, list(self.frame_cache.tier)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def cached_path(self, key):
+        for ext, _, mime in CODECS:
+            path = os.path.join(self.cache_dir, key + ext)
+            if os.path.exists(path):
+                os.utime(path)  # keeps recently used sentences from being pruned
+                return path, mime
+        return None
+
+    def compose(self, video_paths):
+        # Returns a Future resolving to (path, mime type) or None when no clip
+        # could be decoded. Concurrent requests for the same key share a job.
+        key = self.key(video_paths)
+        cached = self.cached_path(key)
+        if cached:
+            future = Future()
+            future.set_result(cached)
+            return future
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            future = self.executor.submit(self._compose, key, list(video_paths))
+            self._pending[key] = future
+        # Outside the lock: a job that is already done runs the callback
+        # right here, and _forget takes the lock itself
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def _compose(self, key, video_paths):
+        if self.pool is not None:
+            # Decoded and encoded in a worker process, off this one's GIL
+            result = self.pool.compose(key, video_paths, self.cache_dir, self.frame_cache.tier)
+        else:
+            clips = [clip for clip in map(self.frame_cache.get, video_paths) if clip is not None]
+            result = write_sentence(key, clips, self.cache_dir) if clips else None
+        if result is not None:
+            self._prune()
+        return result
+
+    def _prune(self):
+        try:
+            entries = [e for e in os.scandir(self.cache_dir) if e.is_file() and not e.name.startswith("tmp-")]
+        except FileNotFoundError:
+            return
+        if len(entries) <= self.max_files:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_files]:
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                pass
@@ -0,0 +1,210 @@
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+import cv2
+import numpy as np
+
+# Memory budget and display tier can be tuned per deployment
+DEFAULT_BUDGET_MB = int(os.environ.get("ISL_FRAME_CACHE_MB", "512"))
+DEFAULT_DISPLAY_WIDTH = int(os.environ.get("ISL_DISPLAY_WIDTH", "360"))
+# Frames are letterboxed to width x height so every clip has the same size;
+# 0 keeps each clip's own aspect ratio. 16:9 by default like the dataset
+# clips (1280x720), so frames carry no letterbox; kept even for encoders.
+DEFAULT_DISPLAY_HEIGHT = int(os.environ.get("ISL_DISPLAY_HEIGHT", str(DEFAULT_DISPLAY_WIDTH * 9 // 32 * 2)))
+# rgb, gray (one channel: a third of the memory) or palette (posterized
+# colours, which compress better when frames are sent to a browser)
+DEFAULT_DISPLAY_MODE = os.environ.get("ISL_DISPLAY_MODE", "rgb").lower()
+DISPLAY_MODES = ("rgb", "gray", "palette")
+PALETTE_BITS = 4
+# Serve letter clips from one preloaded atlas (see letter_atlas.py)
+USE_LETTER_ATLAS = os.environ.get("ISL_LETTER_ATLAS", "1") != "0"
+
+# frames: uint8 array of shape (n, height, width, 3) in RGB order, or
+# (n, height, width) for the gray tier
+Clip = namedtuple("Clip", ["frames", "fps"])
+DisplayTier = namedtuple("DisplayTier", ["width", "height", "mode"])
+
+
+def display_tier(width=None, height=None, mode=None):
+    width = DEFAULT_DISPLAY_WIDTH if width is None else width
+    height = DEFAULT_DISPLAY_HEIGHT if height is None else height
+    mode = (mode or DEFAULT_DISPLAY_MODE).lower()
+    if mode not in DISPLAY_MODES:
+        raise ValueError(f"Unknown display mode {mode!r}; choose from {', '.join(DISPLAY_MODES)}")
+    return DisplayTier(width, height, mode)
+
+
+DEFAULT_TIER = display_tier()
+
+
+def fit_frame(frame, tier=DEFAULT_TIER):
+    # One BGR frame from OpenCV -> the tier's size and colour mode. Frames
+    # are only ever scaled down; the rest of the canvas is black.
+    h, w = frame.shape[:2]
+    width = tier.width or w
+    scale = min(1.0, width / w, tier.height / h if tier.height else 1.0)
+    if scale < 1.0:
+        frame = cv2.resize(frame, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+    if tier.mode == "gray":
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    else:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if tier.mode == "palette":
+            frame &= (0xFF << (8 - PALETTE_BITS)) & 0xFF
+    if not tier.height:
+        return frame
+    h, w = frame.shape[:2]
+    canvas = np.zeros((tier.height, width) + frame.shape[2:], dtype=np.uint8)
+    top, left = (tier.height - h) // 2, (width - w) // 2
+    canvas[top:top + h, left:left + w] = frame
+    return canvas
+
+
+def decode_clip(video_path, tier=DEFAULT_TIER):
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    frames = []
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(fit_frame(frame, tier))
+    finally:
+        cap.release()
+    if not frames:
+        return None
+    return Clip(np.stack(frames), fps)
+
+
+class FrameCache:
+    # Decoded clips kept in memory, least recently used evicted first once
+    # the total frame bytes exceed the budget. Clips are kept per display
+    # tier; `tier` is the one used when callers do not ask for another.
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB, tier=DEFAULT_TIER, store=None):
+        self.budget = budget_mb * 1024 * 1024
+        self.tier = tier
+        self.store = store
+        # Letter clips come from here when set; its bytes count against the
+        # budget, so the LRU shrinks to make room once it is built
+        self.atlas = None
+        # (video_path, tier) -> Clip or None; the Streamlit server may point
+        # this at a process pool (see process_pool.py)
+        self.decoder = decode_clip
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._clips = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def width(self):
+        return self.tier.width
+
+    def get(self, video_path, tier=None):
+        # A packed frame store (see frame_store.py) is zero-copy and shared
+        # between processes, so its clips never count against the budget.
+        tier = tier or self.tier
+        if self.atlas is not None and tier == self.tier and video_path in self.atlas:
+            # None while the atlas is still being built; decoded below meanwhile
+            clip = self.atlas.get(video_path)
+            if clip is not None:
+                with self._lock:
+                    self._evict()
+                return clip
+        if self.store is not None and self.store.tier == tier:
+            clip = self.store.get(video_path)
+            if clip is not None:
+                return clip
+
+        key = (video_path, tier)
+        with self._lock:
+            clip = self._clips.get(key)
+            if clip is not None:
+                self._clips.move_to_end(key)
+                self.hits += 1
+                return clip
+            self.misses += 1
+
+        # Decode outside the lock so other sessions/threads are not blocked
+        clip = self.decoder(video_path, tier)
+        if clip is not None:
+            self._put(key, clip)
+        return clip
+
+    def load_uncached(self, video_path):
+        # Store or decode, without touching the LRU (used to fill the atlas)
+        if self.store is not None and self.store.tier == self.tier:
+            clip = self.store.get(video_path)
+            if clip is not None:
+                return clip
+        return self.decoder(video_path, self.tier)
+
+    def __contains__(self, video_path):
+        if self.atlas is not None and self.atlas.built and video_path in self.atlas:
+            return True
+        if self.store is not None and self.store.tier == self.tier and video_path in self.store:
+            return True
+        with self._lock:
+            return (video_path, self.tier) in self._clips
+
+    def _reserved(self):
+        return self.atlas.nbytes if self.atlas is not None else 0
+
+    def _evict(self):
+        reserved = self._reserved()
+        while self._clips and self.nbytes + reserved > self.budget:
+            _, evicted = self._clips.popitem(last=False)
+            self.nbytes -= evicted.frames.nbytes
+
+    def _put(self, key, clip):
+        size = clip.frames.nbytes
+        if size + self._reserved() > self.budget:
+            return
+        with self._lock:
+            previous = self._clips.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous.frames.nbytes
+            self._clips[key] = clip
+            self.nbytes += size
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._clips.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "clips": len(self._clips),
+                "bytes": self.nbytes,
+                "budget": self.budget,
+                "atlas_bytes": self._reserved(),
+                "tier": "{}x{} {}".format(*self.tier),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_frame_cache(base_dir='datasets'):
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            from frame_store import open_store
+            _cache = FrameCache(store=open_store(base_dir))
+            if USE_LETTER_ATLAS and _cache.tier.height:
+                from letter_atlas import LetterAtlas
+                _cache.atlas = LetterAtlas(base_dir, _cache.tier, loader=_cache.load_uncached, max_bytes=_cache.budget,
+                                           store=_cache.store)
+                # Sequence lengths follow the (possibly trimmed) letters played
+                from sequence_cache import sequence_cache
+                sequence_cache.attach(_cache.atlas)
+        return _cache
@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+import shutil
+import struct
+import sys
+import tempfile
+
+import numpy as np
+
+from frame_cache import Clip, DEFAULT_TIER, DISPLAY_MODES, DisplayTier, decode_clip, display_tier
+from video_index import VideoIndex, dataset_mtimes, file_signature, get_index
+
+# File layout:
+#   MAGIC | uint64 header length | JSON header | padding | raw RGB frames
+# Every clip is stored as contiguous uint8 frames of shape (frames, *shape)
+# starting at header["clips"][key]["offset"] bytes into the data section,
+# already converted to the display tier recorded in header["tier"]. Each
+# entry records the [mtime_ns, size] of its source clip ("source"); an entry
+# whose clip has changed since is not served. The clips are checked against
+# it when the store is first read and again whenever the video index finds a
+# change in the dataset folders, not on every read.
+MAGIC = b"ISLFRM01"
+ALIGN = 4096
+DEFAULT_STORE = "frames.store"
+
+
+def clip_key(video_path, base_dir='datasets'):
+    rel = os.path.relpath(video_path, base_dir)
+    return os.path.splitext(rel)[0].replace(os.sep, "/").lower()
+
+
+def build_store(base_dir='datasets', output=None, tier=DEFAULT_TIER, log=print):
+    output = output or os.path.join(base_dir, DEFAULT_STORE)
+    index = VideoIndex(base_dir)
+    sources = list(index.words.values()) + list(index.letters.values())
+
+    clips = {}
+    offset = 0
+    out_dir = os.path.dirname(os.path.abspath(output))
+    # Frames are streamed to a scratch file first so memory stays at one clip
+    with tempfile.TemporaryFile(dir=out_dir) as data:
+        for video_path in sorted(sources):
+            # Taken before decoding so a clip replaced meanwhile is not trusted
+            source = file_signature(video_path)
+            clip = decode_clip(video_path, tier)
+            if clip is None:
+                log(f"⚠ Skipping unreadable clip {video_path}")
+                continue
+            frames = np.ascontiguousarray(clip.frames)
+            data.write(frames.tobytes())
+            clips[clip_key(video_path, base_dir)] = {
+                "offset": offset,
+                "frames": int(frames.shape[0]),
+                "shape": list(frames.shape[1:]),
+                "fps": float(clip.fps),
+                "source": source,
+            }
+            offset += frames.nbytes
+
+        header = json.dumps({
+            "version": 2,
+            "width": tier.width,
+            "tier": list(tier),
+            "dataset_mtimes": dataset_mtimes(base_dir),
+            "clips": clips,
+        }).encode("utf-8")
+        prefix = len(MAGIC) + 8 + len(header)
+        data_offset = -(-prefix // ALIGN) * ALIGN
+
+        fd, tmp_path = tempfile.mkstemp(dir=out_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(MAGIC)
+                out.write(struct.pack("<Q", len(header)))
+                out.write(header)
+                out.write(b"\0" * (data_offset - prefix))
+                data.seek(0)
+                shutil.copyfileobj(data, out, 16 * 1024 * 1024)
+            os.replace(tmp_path, output)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    log(f"✅ Packed {len(clips)} clips ({offset / 1e6:.1f} MB) into {output}")
+    return output
+
+
+class FrameStore:
+    # Read-only view over a packed store; frames are served straight from the
+    # memory map, so worker processes share the same page cache.
+    def __init__(self, path, base_dir='datasets'):
+        self.path = path
+        self.base_dir = base_dir
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a frame store")
+            (header_len,) = struct.unpack("<Q", f.read(8))
+            self.header = json.loads(f.read(header_len).decode("utf-8"))
+        prefix = len(MAGIC) + 8 + header_len
+        data_offset = -(-prefix // ALIGN) * ALIGN
+        self.clips = self.header["clips"]
+        # Stores from before display tiers have none and are not used
+        self.tier = DisplayTier(*self.header["tier"]) if "tier" in self.header else None
+        self._data = np.memmap(path, dtype=np.uint8, mode="r", offset=data_offset)
+        # (video index generation, {key: entry} of the clips unchanged since the build)
+        self._checked = (None, {})
+
+    def is_stale(self):
+        # Clips added, removed or renamed since the build
+        return self.header.get("dataset_mtimes") != dataset_mtimes(self.base_dir)
+
+    def _current(self):
+        index = get_index(self.base_dir)
+        generation, current = self._checked
+        if generation != index.generation:
+            current = {}
+            for video_path in list(index.words.values()) + list(index.letters.values()):
+                key = clip_key(video_path, self.base_dir)
+                entry = self.clips.get(key)
+                if entry is not None and entry.get("source") == file_signature(video_path):
+                    current[key] = entry
+            self._checked = (index.generation, current)
+        return current
+
+    def _entry(self, video_path):
+        # None for clips not in the store or overwritten since the build
+        return self._current().get(clip_key(video_path, self.base_dir))
+
+    def __contains__(self, video_path):
+        return self._entry(video_path) is not None
+
+    def get(self, video_path):
+        entry = self._entry(video_path)
+        if entry is None:
+            return None
+        shape = entry["shape"]
+        start = entry["offset"]
+        end = start + entry["frames"] * int(np.prod(shape))
+        frames = self._data[start:end].reshape(entry["frames"], *shape)
+        return Clip(frames, entry["fps"])
+
+    def span(self, video_paths):
+        # One view over several clips stored back to back with the same frame
+        # shape (the letters are: clips are packed in path order):
+        # (frames, {video_path: index of its first frame}), or None
+        entries = sorted(((self._entry(path), path) for path in video_paths),
+                         key=lambda item: item[0]["offset"] if item[0] else -1)
+        if not entries or entries[0][0] is None:
+            return None
+        shape = entries[0][0]["shape"]
+        frame_bytes = int(np.prod(shape))
+        start = end = entries[0][0]["offset"]
+        first = {}
+        for entry, path in entries:
+            if entry["shape"] != shape or entry["offset"] != end:
+                return None
+            first[path] = (end - start) // frame_bytes
+            end += entry["frames"] * frame_bytes
+        return self._data[start:end].reshape(-1, *shape), first
+
+
+def open_store(base_dir='datasets', path=None):
+    path = path or os.path.join(base_dir, DEFAULT_STORE)
+    if not os.path.exists(path):
+        return None
+    try:
+        store = FrameStore(path, base_dir)
+    except (OSError, ValueError) as e:
+        print(f"⚠ Ignoring frame store {path}: {e}")
+        return None
+    if store.is_stale():
+        print(f"⚠ Dataset changed since {path} was built; run: python -m frame_store build")
+        return None
+    if store.tier != DEFAULT_TIER:
+        print(f"⚠ {path} was built for display tier {store.tier}, not {tuple(DEFAULT_TIER)}; clips will be decoded")
+    return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m frame_store",
+                                     description="Pack the sign clips into one memory-mapped frame store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="decode all clips into a store file")
+    build.add_argument("--base-dir", default="datasets")
+    build.add_argument("--output", default=None, help=f"default: <base-dir>/{DEFAULT_STORE}")
+    build.add_argument("--width", type=int, default=DEFAULT_TIER.width)
+    build.add_argument("--height", type=int, default=DEFAULT_TIER.height, help="0 keeps each clip's aspect ratio")
+    build.add_argument("--mode", choices=DISPLAY_MODES, default=DEFAULT_TIER.mode)
+
+    info = sub.add_parser("info", help="list the clips in a store file")
+    info.add_argument("--base-dir", default="datasets")
+    info.add_argument("--path", default=None)
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        build_store(args.base_dir, args.output, display_tier(args.width, args.height, args.mode))
+        return 0
+
+    path = args.path or os.path.join(args.base_dir, DEFAULT_STORE)
+    store = FrameStore(path, args.base_dir)
+    for key, entry in sorted(store.clips.items()):
+        h, w = entry["shape"][:2]
+        print(f"{key:40s} {entry['frames']:5d} frames  {w}x{h}  {entry['fps']:.1f} fps")
+    print(f"{len(store.clips)} clips, tier: {store.tier}, stale: {store.is_stale()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+import functools
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = int(os.environ.get("ISL_GLOSS_CACHE_SIZE", "4096"))
+
+
+class GlossCache:
+    # Bounded LRU memo from preprocessed text to ISL gloss, so repeated
+    # phrases skip the spaCy pipeline entirely.
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text):
+        with self._lock:
+            gloss = self._entries.get(text)
+            if gloss is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(text)
+            self.hits += 1
+            return gloss
+
+    def put(self, text, gloss):
+        with self._lock:
+            self._entries[text] = gloss
+            self._entries.move_to_end(text)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def memoize(self, func):
+        @functools.wraps(func)
+        def wrapper(text):
+            gloss = self.get(text)
+            if gloss is None:
+                gloss = func(text)
+                self.put(text, gloss)
+            return gloss
+        wrapper.cache = self
+        return wrapper
+
+    def items(self):
+        # (text, gloss) pairs, least recently used first
+        with self._lock:
+            return list(self._entries.items())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+# One process-wide memo shared by sst.py, app.py and streamlit_app.py
+gloss_cache = GlossCache()
@@ -0,0 +1,242 @@
+import argparse
+import json
+import os
+import sys
+import threading
+from importlib import metadata
+
+from isl_gloss import KEEP_WORDS, gloss_token, preprocess
+from metrics import metrics
+from nlp_loader import MODEL_NAME, get_nlp
+from video_index import VideoIndex
+
+# Built with `python -m gloss_lexicon build`; not shipped with the repo
+DEFAULT_PATH = os.environ.get("ISL_GLOSS_LEXICON", os.path.join(".cache", "gloss_lexicon.json"))
+DEFAULT_CORPUS = os.path.join("benchmarks", "sentences.txt")
+# Never used to build the lexicon, so verify compares glosses it has not seen
+HELDOUT_CORPUS = os.path.join("benchmarks", "heldout_sentences.txt")
+VERSION = 1
+
+# Words every sentence is built from besides the sign vocabulary
+FUNCTION_WORDS = (
+    "i you he she it we they me him her us them my your his its our their mine yours myself yourself "
+    "a an the this that these those some any each every no "
+    "am is are was were be been being do does did done have has had having "
+    "will would shall should can could may might must not "
+    "to of in on at for with from by about into over after before under near up down out off "
+    "and or but so if then than because when where what who whom whose which why how "
+    "here there now today tomorrow yesterday again also very too just please yes"
+).split()
+
+# Carrier sentences a word is tagged in; it only goes into the lexicon when
+# every carrier and every corpus occurrence gives the same gloss token
+CARRIERS = ("{w}", "i {w}", "i {w} it", "they will {w}", "it was {w}", "we {w} the book")
+
+
+def inflections(word):
+    # Regular English inflections; irregular forms come from FUNCTION_WORDS
+    # and the corpus
+    forms = {word, word + "s", word + "ed", word + "ing"}
+    if word.endswith("e"):
+        forms |= {word + "d", word[:-1] + "ing"}
+    if word.endswith(("s", "sh", "ch", "x", "z", "o")):
+        forms.add(word + "es")
+    if word.endswith("y") and len(word) > 2 and word[-2] not in "aeiou":
+        forms |= {word[:-1] + "ies", word[:-1] + "ied"}
+    if len(word) > 2 and word[-1] not in "aeiouwxy" and word[-2] in "aeiou" and word[-3] not in "aeiou":
+        forms |= {word + word[-1] + "ed", word + word[-1] + "ing"}
+    return forms
+
+
+def model_version(model_name=MODEL_NAME):
+    try:
+        return metadata.version(model_name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def read_corpus(paths):
+    sentences = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            sentences.extend(line.strip() for line in f if line.strip())
+    return sentences
+
+
+def build_lexicon(base_dir='datasets', corpus=(DEFAULT_CORPUS,), output=DEFAULT_PATH, log=print):
+    nlp = get_nlp()
+    index = VideoIndex(base_dir)
+    sentences = [preprocess(text) for text in read_corpus([path for path in corpus if os.path.exists(path)])]
+
+    vocabulary = set(FUNCTION_WORDS) | KEEP_WORDS
+    for name in index.words:
+        for word in preprocess(name).split():
+            vocabulary |= inflections(word)
+    for sentence in sentences:
+        vocabulary.update(sentence.split())
+
+    # Only words spaCy keeps as one token can be looked up by whitespace split
+    words = sorted(vocabulary)
+    single = {word for word, doc in zip(words, nlp.pipe(words)) if len(doc) == 1 and doc[0].text == word}
+
+    observed = {}
+    texts = [carrier.format(w=word) for word in single for carrier in CARRIERS] + sentences
+    for doc in nlp.pipe(texts, batch_size=256):
+        for token in doc:
+            if token.text in single:
+                observed.setdefault(token.text, set()).add(gloss_token(token))
+
+    entries = {}
+    ambiguous = []
+    for word, results in sorted(observed.items()):
+        if len(results) == 1:
+            entries[word] = list(next(iter(results)))
+        else:
+            ambiguous.append(word)
+
+    lexicon = {
+        "version": VERSION,
+        "model": MODEL_NAME,
+        "model_version": model_version(),
+        "keep_words": sorted(KEEP_WORDS),
+        "entries": entries,
+        "ambiguous": ambiguous,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    tmp_path = output + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(lexicon, f, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, output)
+    log(f"✅ {len(entries)} words in {output} ({len(ambiguous)} context-dependent words left to spaCy)")
+    return lexicon
+
+
+class GlossLexicon:
+    # word -> (gloss word or None, tense marker or None), exactly what
+    # isl_gloss.gloss_token gives for it. Sentences made only of lexicon
+    # words are glossed with dict lookups; anything else returns None so
+    # the caller runs spaCy on the whole sentence (tags depend on context).
+    def __init__(self, entries):
+        self.entries = {word: tuple(value) for word, value in entries.items()}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        # None if the file is missing or was built for another model/rule set
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"⚠ Ignoring gloss lexicon {path}: {e}")
+            return None
+        current = (VERSION, MODEL_NAME, model_version(), sorted(KEEP_WORDS))
+        if (data.get("version"), data.get("model"), data.get("model_version"), data.get("keep_words")) != current:
+            print(f"⚠ Gloss lexicon {path} is out of date; run: python -m gloss_lexicon build")
+            return None
+        return cls(data["entries"])
+
+    def gloss(self, text):
+        # text: preprocessed (lowercase, no punctuation)
+        words = text.split()
+        if " ".join(words) != text:
+            # Irregular spacing becomes whitespace tokens in spaCy
+            self.misses += 1
+            metrics.incr("gloss_lexicon_fallbacks")
+            return None
+        important_words = []
+        tense_marker = ""
+        for word in words:
+            entry = self.entries.get(word)
+            if entry is None:
+                self.misses += 1
+                metrics.incr("gloss_lexicon_fallbacks")
+                return None
+            gloss, marker = entry
+            if gloss is not None:
+                important_words.append(gloss)
+            if marker:
+                tense_marker = marker
+        if tense_marker:
+            important_words.append(tense_marker)
+        self.hits += 1
+        metrics.incr("gloss_lexicon_hits")
+        return ' '.join(important_words).lower()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"words": len(self.entries), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
+
+
+_lexicon = None
+_loaded = False
+_lock = threading.Lock()
+
+
+def get_lexicon():
+    global _lexicon, _loaded
+    if not _loaded:
+        with _lock:
+            if not _loaded:
+                _lexicon = GlossLexicon.load()
+                _loaded = True
+    return _lexicon
+
+
+def gloss_fast(text):
+    # Lexicon gloss of a preprocessed text, or None when spaCy is needed
+    lexicon = get_lexicon()
+    return lexicon.gloss(text) if lexicon is not None else None
+
+
+def verify(corpus, path=DEFAULT_PATH, log=print):
+    # Glosses every sentence both ways; returns the number of mismatches
+    from isl_gloss import gloss_doc
+
+    lexicon = GlossLexicon.load(path)
+    if lexicon is None:
+        log(f"❌ No usable lexicon at {path}; run: python -m gloss_lexicon build")
+        return 1
+    nlp = get_nlp()
+    sentences = [preprocess(text) for text in read_corpus(corpus)]
+    covered = mismatches = 0
+    for text, doc in zip(sentences, nlp.pipe(sentences)):
+        fast = lexicon.gloss(text)
+        if fast is None:
+            continue
+        covered += 1
+        expected = gloss_doc(doc)
+        if fast != expected:
+            mismatches += 1
+            log(f"❌ {text!r}: lexicon {fast!r} != spaCy {expected!r}")
+    log(f"{'✅' if not mismatches else '❌'} {covered}/{len(sentences)} sentences served by the lexicon,"
+        f" {mismatches} mismatches")
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gloss_lexicon",
+                                     description="Build or check the precompiled gloss lexicon.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="tag the vocabulary with spaCy once and write the lexicon")
+    build.add_argument("--base-dir", default="datasets")
+    build.add_argument("--corpus", nargs="*", default=[DEFAULT_CORPUS], help="extra sentences to learn contexts from")
+    build.add_argument("-o", "--output", default=DEFAULT_PATH)
+
+    check = sub.add_parser("verify", help="compare lexicon and spaCy glosses over sentences outside the build corpus")
+    check.add_argument("corpus", nargs="*", default=[HELDOUT_CORPUS])
+    check.add_argument("--path", default=DEFAULT_PATH)
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        build_lexicon(args.base_dir, args.corpus, args.output)
+        return 0
+    return 1 if verify(args.corpus, args.path) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
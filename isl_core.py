@@ -0,0 +1,51 @@
+from gloss_cache import gloss_cache
+from gloss_lexicon import gloss_fast
+from isl_gloss import gloss_doc, preprocess
+from nlp_loader import get_nlp
+from sequence_cache import sequence_cache
+
+# The speech -> gloss -> video sequence core shared by the Streamlit, Tk and
+# console front ends and by the HTTP service.
+
+LANGUAGE_MAP = {
+    "English": "en-IN",
+    "Tamil": "ta-IN",
+    "Telugu": "te-IN",
+    "Hindi": "hi-IN"
+}
+
+
+@gloss_cache.memoize
+def isl_gloss_spacy(text):
+    # Sentences made only of precompiled lexicon words skip the model
+    gloss = gloss_fast(text)
+    if gloss is None:
+        gloss = gloss_doc(get_nlp()(text))
+    return gloss
+
+
+def gloss_many(texts, batch_size=64):
+    # Glosses already-preprocessed texts in one nlp.pipe pass; texts found in
+    # the gloss memo skip the model
+    glosses = [gloss_cache.get(text) for text in texts]
+    for i, gloss in enumerate(glosses):
+        if gloss is None:
+            glosses[i] = gloss_fast(texts[i])
+            if glosses[i] is not None:
+                gloss_cache.put(texts[i], glosses[i])
+    missing = [i for i, gloss in enumerate(glosses) if gloss is None]
+    if missing:
+        docs = get_nlp().pipe((texts[i] for i in missing), batch_size=batch_size)
+        for i, doc in zip(missing, docs):
+            glosses[i] = gloss_doc(doc)
+            gloss_cache.put(texts[i], glosses[i])
+    return glosses
+
+
+def get_video_sequence(gloss_sentence, base_dir='datasets', partial_spelling=False):
+    return list(sequence_cache.get(gloss_sentence, base_dir, partial_spelling).clips)
+
+
+def sequence_info(gloss_sentence, base_dir='datasets', partial_spelling=False):
+    # Sequence(clips, frames, duration) for showing progress before playback
+    return sequence_cache.get(gloss_sentence, base_dir, partial_spelling)
@@ -0,0 +1,57 @@
+import re
+from collections import deque
+
+from nlp_loader import get_nlp
+
+KEEP_WORDS = {"left", "right", "back", "forward", "up", "down", "near", "on", "in", "under", "to", "from"}
+
+
+def preprocess(text):
+    return re.sub(r'[^\w\s]', '', text.lower())
+
+
+def gloss_token(token):
+    # (gloss word or None, tense marker or None) for one spaCy token
+    if token.text.lower() in KEEP_WORDS:
+        return token.text.lower(), None
+    if token.pos_ == "AUX" and token.lemma_ == "will":
+        return None, "FUTURE"
+    if token.pos_ in {"AUX", "DET", "ADP"}:
+        return None, None
+    if token.tag_ in {"VBD", "VBN"}:
+        return token.lemma_.lower(), "PAST"
+    return token.lemma_.lower(), None
+
+
+def gloss_doc(doc):
+    # ISL gloss rules applied to an already-parsed spaCy Doc
+    important_words = []
+    tense_marker = ""
+
+    for token in doc:
+        word, marker = gloss_token(token)
+        if word is not None:
+            important_words.append(word)
+        if marker:
+            tense_marker = marker
+
+    if tense_marker:
+        important_words.append(tense_marker)
+
+    return ' '.join(important_words).lower()
+
+
+def gloss_texts(texts, batch_size=1000, n_process=1, nlp=None):
+    # Lazily glosses an iterable of raw texts through nlp.pipe, yielding
+    # (text, gloss) in input order; memory use does not grow with the input.
+    nlp = nlp or get_nlp()
+    texts = iter(texts)
+    pending = deque()
+
+    def processed():
+        for text in texts:
+            pending.append(text)
+            yield preprocess(text)
+
+    for doc in nlp.pipe(processed(), batch_size=batch_size, n_process=n_process):
+        yield pending.popleft(), gloss_doc(doc)
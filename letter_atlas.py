@@ -0,0 +1,188 @@
+import argparse
+import os
+import threading
+
+import numpy as np
+
+from frame_cache import Clip, DEFAULT_TIER, decode_clip
+from video_index import get_index
+
+# Trim the still frames a letter clip starts and ends with (faster spelling)
+DEFAULT_TRIM = os.environ.get("ISL_LETTER_TRIM", "0") == "1"
+# Mean absolute change between consecutive frames (0-255) below which a
+# frame counts as idle
+IDLE_THRESHOLD = float(os.environ.get("ISL_LETTER_IDLE_THRESHOLD", "1.5"))
+# Frames kept on each side of the first/last movement when trimming
+TRIM_MARGIN = 2
+
+
+def active_range(frames, threshold=IDLE_THRESHOLD, margin=TRIM_MARGIN):
+    # (start, stop) of the frames between the idle lead-in and lead-out
+    if len(frames) < 3:
+        return 0, len(frames)
+    motion = np.abs(np.diff(frames.astype(np.int16), axis=0)).reshape(len(frames) - 1, -1).mean(axis=1)
+    moving = np.flatnonzero(motion >= threshold)
+    if not len(moving):
+        return 0, len(frames)
+    return max(0, int(moving[0]) - margin), min(len(frames), int(moving[-1]) + 2 + margin)
+
+
+class LetterAtlas:
+    # All letter/digit clips of a dataset decoded once into one contiguous
+    # array of uniform frames. ranges[char] = (start, stop, fps) into it, so
+    # a fingerspelled word is a list of slices of one buffer instead of a
+    # file open and decode per character. Needs a display tier with a fixed
+    # height so every frame has the same shape.
+    #
+    # Nothing is decoded until a letter clip is first asked for; the build
+    # then runs on a background thread and get() returns None (callers decode
+    # the clip themselves) until it is done. A build larger than max_bytes is
+    # abandoned and letters stay with the caller's cache.
+    #
+    # With a frame store of the same tier the atlas is a view of the store's
+    # memory map instead of a copy, and owns no bytes of its own.
+    def __init__(self, base_dir='datasets', tier=DEFAULT_TIER, trim=DEFAULT_TRIM, loader=None, max_bytes=None,
+                 store=None, log=print):
+        if not tier.height:
+            raise ValueError("The letter atlas needs a display tier with a fixed height")
+        self.base_dir = base_dir
+        self.tier = tier
+        self.trim = trim
+        self.loader = loader or (lambda path: decode_clip(path, tier))
+        self.max_bytes = max_bytes
+        self.store = store if store is not None and store.tier == tier else None
+        self.log = log
+        self.frames = None
+        self.ranges = {}
+        self.trimmed = 0
+        self.owned_bytes = 0
+        self._state = (None, {}, {})
+        self._generation = None
+        self._building = None
+        self._lock = threading.Lock()
+
+    def _mapped(self, index):
+        # (frames, ranges, paths, trimmed) as views of the frame store, or None
+        span = self.store.span(index.letters.values()) if self.store is not None else None
+        if span is None:
+            return None
+        frames, first = span
+        ranges, paths = {}, {}
+        trimmed = 0
+        for char, path in sorted(index.letters.items()):
+            clip = self.store.get(path)
+            start, stop = active_range(clip.frames) if self.trim else (0, len(clip.frames))
+            ranges[char] = (first[path] + start, first[path] + stop, clip.fps)
+            paths[path] = char
+            trimmed += len(clip.frames) - (stop - start)
+        return frames, ranges, paths, trimmed
+
+    def _build(self, index):
+        mapped = self._mapped(index)
+        if mapped is not None:
+            self._swap(index, *mapped, owned=False)
+            return
+        parts, ranges, paths = [], {}, {}
+        offset = trimmed = nbytes = 0
+        for char, path in sorted(index.letters.items()):
+            clip = self.loader(path)
+            if clip is None:
+                continue
+            start, stop = active_range(clip.frames) if self.trim else (0, len(clip.frames))
+            nbytes += clip.frames[start:stop].nbytes
+            if self.max_bytes is not None and nbytes > self.max_bytes:
+                self.log(f"⚠ Letter atlas needs more than {self.max_bytes / 2**20:.0f} MB; letters are decoded per clip")
+                parts, ranges, paths, trimmed = [], {}, {}, 0
+                break
+            parts.append(clip.frames[start:stop])
+            ranges[char] = (offset, offset + stop - start, clip.fps)
+            paths[path] = char
+            offset += stop - start
+            trimmed += len(clip.frames) - (stop - start)
+        shape = (0, self.tier.height, self.tier.width) + (() if self.tier.mode == "gray" else (3,))
+        frames = np.ascontiguousarray(np.concatenate(parts)) if parts else np.zeros(shape, np.uint8)
+        self._swap(index, frames, ranges, paths, trimmed, owned=True)
+
+    def _swap(self, index, frames, ranges, paths, trimmed, owned):
+        with self._lock:
+            # Swapped in one assignment so readers never mix two builds
+            self._state = (frames, ranges, paths)
+            self.frames, self.ranges, self.trimmed = frames, ranges, trimmed
+            self.owned_bytes = frames.nbytes if owned else 0
+            self._generation = index.generation
+            self._building = None
+
+    def _current(self):
+        # Builds on this thread if needed (CLI, stats)
+        index = get_index(self.base_dir)
+        if self._generation != index.generation:
+            self._build(index)
+        return self
+
+    def _ready(self):
+        # The current build, or None while one runs in the background
+        index = get_index(self.base_dir)
+        if self._generation == index.generation:
+            return self._state
+        with self._lock:
+            if self._building != index.generation:
+                self._building = index.generation
+                threading.Thread(target=self._build, args=(index,), name="letter-atlas", daemon=True).start()
+        return None
+
+    @property
+    def built(self):
+        return self._generation == get_index(self.base_dir).generation
+
+    @property
+    def nbytes(self):
+        # Memory the atlas holds itself; a view of the frame store is free
+        return self.owned_bytes
+
+    def __contains__(self, video_path):
+        # Answered from the index, without building the atlas
+        return video_path in get_index(self.base_dir).letters.values()
+
+    def letter(self, char):
+        # Clip whose frames are a view into the atlas, or None
+        state = self._ready()
+        if state is None:
+            return None
+        frames, ranges, _ = state
+        entry = ranges.get(char.lower())
+        if entry is None:
+            return None
+        start, stop, fps = entry
+        return Clip(frames[start:stop], fps)
+
+    def get(self, video_path):
+        state = self._ready()
+        char = state[2].get(video_path) if state is not None else None
+        return self.letter(char) if char is not None else None
+
+    def stats(self):
+        self._current()
+        return {"letters": len(self.ranges), "frames": len(self.frames), "bytes": self.frames.nbytes,
+                "owned_bytes": self.owned_bytes, "trimmed_frames": self.trimmed}
+
+
+def main(argv=None):
+    from frame_cache import get_frame_cache
+
+    parser = argparse.ArgumentParser(prog="python -m letter_atlas", description="Show the letter atlas layout.")
+    parser.add_argument("--base-dir", default="datasets")
+    parser.add_argument("--trim", action="store_true", help="trim idle lead-in/lead-out frames")
+    args = parser.parse_args(argv)
+    cache = get_frame_cache(args.base_dir)
+    atlas = LetterAtlas(args.base_dir, cache.tier, trim=args.trim or DEFAULT_TRIM, loader=cache.load_uncached,
+                        store=cache.store)
+    for char, (start, stop, fps) in sorted(atlas._current().ranges.items()):
+        print(f"{char}  frames {start:5d}-{stop:5d}  ({(stop - start) / fps:.2f}s)")
+    stats = atlas.stats()
+    print(f"{stats['letters']} letters, {stats['frames']} frames, {stats['bytes'] / 1e6:.1f} MB"
+          f" ({'copied' if stats['owned_bytes'] else 'mapped from the frame store'}),"
+          f" {stats['trimmed_frames']} idle frames trimmed")
+
+
+if __name__ == "__main__":
+    main()
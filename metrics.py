@@ -0,0 +1,165 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latest samples kept per histogram for percentiles
+DEFAULT_WINDOW = 2048
+
+# Stages in the order a phrase goes through them
+STAGES = ("listen", "recognize", "translate", "gloss", "sequence", "first_frame", "utterance")
+
+
+class Histogram:
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._samples = deque(maxlen=window)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self._samples.append(value)
+
+    def percentile(self, p):
+        samples = sorted(self._samples)
+        if not samples:
+            return 0.0
+        rank = min(len(samples) - 1, max(0, math.ceil(p / 100 * len(samples)) - 1))
+        return samples[rank]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "avg": self.sum / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class Metrics:
+    # Process-wide latency histograms (seconds) and counters
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.window)
+            histogram.observe(seconds)
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def first_frame(self, captured_at, ready_at):
+        # Called when the first frame of a phrase is on screen: time since the
+        # gloss was ready, and end-to-end time since the speech was captured
+        now = time.perf_counter()
+        if ready_at is not None:
+            self.observe("first_frame", now - ready_at)
+        if captured_at is not None:
+            self.observe("utterance", now - captured_at)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "histograms": {name: h.summary() for name, h in self.histograms.items()},
+                "counters": dict(self.counters),
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+
+    def to_prometheus(self, prefix="isl"):
+        snapshot = self.snapshot()
+        lines = []
+        for name, summary in sorted(snapshot["histograms"].items()):
+            metric = f"{prefix}_{name}_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for q in ("p50", "p95", "p99"):
+                lines.append(f'{metric}{{quantile="0.{q[1:]}"}} {summary[q]:.6f}')
+            lines.append(f"{metric}_sum {summary['sum']:.6f}")
+            lines.append(f"{metric}_count {summary['count']}")
+        for name, value in sorted(snapshot["counters"].items()):
+            metric = f"{prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self, names=STAGES):
+        # Short human-readable lines for log boxes and the console
+        snapshot = self.snapshot()
+        lines = []
+        for name in list(names) + sorted(set(snapshot["histograms"]) - set(names)):
+            summary = snapshot["histograms"].get(name)
+            if summary:
+                lines.append(f"{name}: p50 {summary['p50'] * 1000:.0f}ms · p95 {summary['p95'] * 1000:.0f}ms"
+                             f" · p99 {summary['p99'] * 1000:.0f}ms (n={summary['count']})")
+        for name, value in sorted(snapshot["counters"].items()):
+            lines.append(f"{name}: {value}")
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+
+metrics = Metrics()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/metrics.json"):
+            body, content_type = metrics.to_json(), "application/json"
+        elif self.path.startswith("/metrics"):
+            body, content_type = metrics.to_prometheus(), "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port=None, host="0.0.0.0"):
+    # Serves /metrics (Prometheus text) and /metrics.json on a daemon thread.
+    # Without a port argument, ISL_METRICS_PORT decides; returns None if unset.
+    port = port or int(os.environ.get("ISL_METRICS_PORT", "0"))
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
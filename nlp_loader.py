@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+MODEL_NAME = "en_core_web_sm"
+# isl_gloss_spacy only reads pos_, tag_ and lemma_, which come from
+# tok2vec + tagger + attribute_ruler + lemmatizer. The rest is skipped.
+EXCLUDED_COMPONENTS = ["parser", "ner", "senter"]
+
+timings = {}
+
+# Download the model on first use when it is missing (used by the web UI)
+auto_download = os.environ.get("ISL_SPACY_AUTO_DOWNLOAD") == "1"
+
+_nlp = None
+_lock = threading.Lock()
+
+
+def load_model(model_name=MODEL_NAME):
+    import spacy
+
+    start = time.perf_counter()
+    try:
+        nlp = spacy.load(model_name, exclude=EXCLUDED_COMPONENTS)
+    except OSError as e:
+        raise OSError(f"spaCy model '{model_name}' is missing. Please run: python -m spacy download {model_name}") from e
+    timings["model_load"] = time.perf_counter() - start
+    print(f"⏱ Loaded {model_name} ({', '.join(nlp.pipe_names)}) in {timings['model_load']:.2f}s")
+    return nlp
+
+
+def get_nlp():
+    # Loaded on the first gloss request rather than at import time
+    global _nlp
+    if _nlp is None:
+        with _lock:
+            if _nlp is None:
+                try:
+                    _nlp = load_model()
+                except OSError:
+                    if not auto_download:
+                        raise
+                    subprocess.run([sys.executable, "-m", "spacy", "download", MODEL_NAME], check=False)
+                    _nlp = load_model()
+    return _nlp
+
+
+def report_startup(entry_point, started_at):
+    # started_at: time.perf_counter() taken at the top of the entry point
+    timings["import"] = time.perf_counter() - started_at
+    print(f"⏱ {entry_point} ready in {timings['import']:.2f}s (spaCy model loads on first use)")
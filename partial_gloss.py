@@ -0,0 +1,109 @@
+import threading
+
+from isl_core import get_video_sequence
+from isl_gloss import gloss_token, preprocess
+from nlp_loader import get_nlp
+from prefetch import ClipPrefetcher
+
+
+class IncrementalGlosser:
+    # Glosses a phrase while it is still being recognized. Each partial
+    # transcript is compared with the previous one; words that are unchanged
+    # and not the last (still forming) word count as stable and are glossed
+    # once, with the stable prefix as tagging context. The tense marker is
+    # only known for the whole phrase, so it is emitted by finish().
+    def __init__(self, nlp=None, holdback=1):
+        self.nlp = nlp
+        self.holdback = holdback
+        self.reset()
+
+    def reset(self):
+        self._previous = []
+        self._emitted = 0
+        self._marker = ""
+        self.gloss = []
+
+    def _gloss_range(self, words, stop):
+        # Gloss words[self._emitted:stop], tagging words[:stop] for context
+        nlp = self.nlp or get_nlp()
+        doc = nlp(" ".join(words[:stop]))
+        offset = sum(len(word) + 1 for word in words[:self._emitted])
+        new = []
+        for token in doc:
+            if token.idx < offset or token.is_space:
+                continue
+            word, marker = gloss_token(token)
+            if word is not None:
+                new.append(word)
+            if marker:
+                self._marker = marker
+        self._emitted = stop
+        self.gloss.extend(new)
+        return new
+
+    def update(self, partial_text):
+        # Returns the gloss words that became stable with this partial
+        words = preprocess(partial_text).split()
+        common = 0
+        for old, new in zip(self._previous, words):
+            if old != new:
+                break
+            common += 1
+        self._previous = words
+        stable = min(common, len(words) - self.holdback)
+        if stable <= self._emitted:
+            return []
+        return self._gloss_range(words, stable)
+
+    def finish(self, final_text):
+        # Glosses whatever is left of the final transcript and closes the
+        # phrase with its tense marker. Words already signed are not revised.
+        words = preprocess(final_text).split()
+        new = self._gloss_range(words, len(words)) if len(words) > self._emitted else []
+        if self._marker:
+            new.append(self._marker.lower())
+            self.gloss.append(self._marker.lower())
+        self.reset()
+        return new
+
+
+class PartialSigner:
+    # Turns the partial transcripts of a streaming recognizer into clips
+    # appended to one open-ended ClipPrefetcher, so signing starts about one
+    # word after the speaker instead of one phrase. Gloss rules are English
+    # only, so callers enable it for English input.
+    def __init__(self, base_dir='datasets', partial_spelling=False, loader=None, glosser=None, on_gloss=None):
+        self.base_dir = base_dir
+        self.partial_spelling = partial_spelling
+        self.glosser = glosser or IncrementalGlosser()
+        self.on_gloss = on_gloss
+        self.clips = ClipPrefetcher(loader=loader, open_ended=True)
+        self._lock = threading.Lock()
+
+    def _append(self, words):
+        if not words:
+            return []
+        videos = get_video_sequence(" ".join(words), base_dir=self.base_dir, partial_spelling=self.partial_spelling)
+        self.clips.extend(videos)
+        if self.on_gloss is not None:
+            self.on_gloss(words, videos)
+        return videos
+
+    def on_partial(self, text):
+        with self._lock:
+            return self._append(self.glosser.update(text))
+
+    def on_final(self, text):
+        with self._lock:
+            return self._append(self.glosser.finish(text))
+
+    def wrap_listen(self, listen):
+        # listen() returning final transcripts -> same, finishing each phrase
+        def streaming_listen():
+            text = listen()
+            self.on_final(text)
+            return text
+        return streaming_listen
+
+    def close(self):
+        self.clips.finish()
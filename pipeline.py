@@ -0,0 +1,248 @@
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+from metrics import metrics as default_metrics
+
+DEFAULT_QUEUE_SIZE = 4
+# Capture gives up after this many listen() failures in a row (no microphone,
+# device unplugged); the waits between them double from 0.5s up to 8s
+MAX_LISTEN_FAILURES = int(os.environ.get("ISL_MAX_LISTEN_FAILURES", "5"))
+LISTEN_BACKOFF_MAX = 8.0
+
+
+class SourceIdle(Exception):
+    # Raised by a listen() callable when no phrase was heard this round
+    pass
+
+
+class Phrase:
+    def __init__(self, audio):
+        self.audio = audio
+        self.captured_at = time.perf_counter()
+        self.recognized = None
+        self.translated = None
+        self.gloss = None
+        self.sequence = []
+        self.timings = {}
+        self.error = None
+        self.error_stage = None
+        self.finished_at = None
+
+    @property
+    def latency(self):
+        # Seconds from the end of capture to the result being ready
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.captured_at
+
+
+class SpeechPipeline:
+    # capture -> recognize -> translate -> gloss, each stage on its own thread,
+    # joined by bounded queues. Downstream stages block when the next queue is
+    # full; capture never blocks (the microphone must keep being read) and
+    # drops the oldest waiting phrase instead, which is counted in `dropped`.
+    # Finished (or failed) phrases come out of get() in capture order. A
+    # failing listen() is retried with backoff; only the first failure in a
+    # row comes out as an error phrase, and after max_listen_failures capture
+    # stops with a last one (listen_error is set then).
+    # Stage latencies go to the shared metrics registry (see metrics.py).
+    STAGES = ("recognize", "translate", "gloss")
+
+    def __init__(self, listen, recognize, translate, gloss, sequence=None,
+                 idle_exceptions=(SourceIdle,), queue_size=DEFAULT_QUEUE_SIZE, metrics=None,
+                 max_listen_failures=MAX_LISTEN_FAILURES):
+        self.listen = listen
+        self.recognize = recognize
+        self.translate = translate
+        self.gloss = gloss
+        self.sequence = sequence
+        self.idle_exceptions = tuple(idle_exceptions)
+        self.max_listen_failures = max_listen_failures
+        self.listen_error = None
+        self.dropped = 0
+        self.metrics = metrics or default_metrics
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(len(self.STAGES) + 1)]
+        self._stop = threading.Event()
+        self._threads = []
+
+    # --- Stage bodies ---
+    def _do_recognize(self, phrase):
+        phrase.recognized = self.recognize(phrase.audio)
+
+    def _do_translate(self, phrase):
+        phrase.translated = self.translate(phrase.recognized)
+
+    def _do_gloss(self, phrase):
+        phrase.gloss = self.gloss(phrase.translated)
+        if self.sequence is not None:
+            start = time.perf_counter()
+            phrase.sequence = list(self.sequence(phrase.gloss))
+            phrase.timings["sequence"] = time.perf_counter() - start
+
+    # --- Threads ---
+    def start(self):
+        self._stop.clear()
+        self.listen_error = None
+        self._threads = [threading.Thread(target=self._capture_loop, name="pipeline-listen", daemon=True)]
+        for i, name in enumerate(self.STAGES):
+            body = getattr(self, f"_do_{name}")
+            self._threads.append(threading.Thread(
+                target=self._stage_loop, args=(name, body, self._queues[i], self._queues[i + 1]),
+                name=f"pipeline-{name}", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    @property
+    def running(self):
+        return not self._stop.is_set()
+
+    def _capture_loop(self):
+        inbox = self._queues[0]
+        failures = 0
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            try:
+                audio = self.listen()
+            except self.idle_exceptions:
+                failures = 0
+                continue
+            except Exception as e:
+                failures += 1
+                self.metrics.incr("listen_errors")
+                if failures >= self.max_listen_failures:
+                    self.listen_error = RuntimeError(f"Stopped listening after {failures} failures in a row: {e}")
+                    self.listen_error.__cause__ = e
+                    self._fail_listen(self.listen_error)
+                    return
+                if failures == 1:
+                    self._fail_listen(e)
+                self._stop.wait(min(0.5 * 2 ** (failures - 1), LISTEN_BACKOFF_MAX))
+                continue
+            failures = 0
+            phrase = Phrase(audio)
+            phrase.timings["listen"] = phrase.captured_at - start
+            self.metrics.observe("listen", phrase.timings["listen"])
+            while True:
+                try:
+                    inbox.put_nowait(phrase)
+                    break
+                except queue.Full:
+                    try:
+                        inbox.get_nowait()
+                        self.dropped += 1
+                        self.metrics.incr("dropped_phrases")
+                    except queue.Empty:
+                        pass
+
+    def _fail_listen(self, error):
+        phrase = Phrase(None)
+        phrase.error, phrase.error_stage = error, "listen"
+        self._put(self._queues[-1], phrase)
+
+    def _stage_loop(self, name, body, inbox, outbox):
+        while not self._stop.is_set():
+            try:
+                phrase = inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if phrase.error is None:
+                start = time.perf_counter()
+                try:
+                    body(phrase)
+                except Exception as e:
+                    phrase.error, phrase.error_stage = e, name
+                elapsed = time.perf_counter() - start
+                if "sequence" in phrase.timings and name == "gloss":
+                    self.metrics.observe("sequence", phrase.timings["sequence"])
+                    elapsed -= phrase.timings["sequence"]
+                phrase.timings[name] = elapsed
+                self.metrics.observe(name, elapsed)
+            if outbox is self._queues[-1]:
+                phrase.finished_at = time.perf_counter()
+                if phrase.error is None:
+                    self.metrics.observe("pipeline", phrase.latency)
+                else:
+                    self.metrics.incr(f"{phrase.error_stage}_errors")
+            self._put(outbox, phrase)
+
+    def _put(self, outbox, phrase):
+        while not self._stop.is_set():
+            try:
+                outbox.put(phrase, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self, timeout=None):
+        # Next finished Phrase, or None if nothing arrived within timeout
+        try:
+            return self._queues[-1].get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+# --- Offline stand-ins, so the pipeline can run without a microphone or network ---
+class ScriptedSource:
+    # listen() hands out the scripted phrases (as text "audio"), one per interval
+    def __init__(self, phrases, interval=0.0):
+        self.phrases = list(phrases)
+        self.interval = interval
+
+    def listen(self):
+        if not self.phrases:
+            time.sleep(0.1)
+            raise SourceIdle()
+        time.sleep(self.interval)
+        return self.phrases.pop(0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pipeline",
+                                     description="Run the speech pipeline offline with stub recognizer/translator.")
+    parser.add_argument("phrases", nargs="+", help="phrases fed to the pipeline as if spoken")
+    parser.add_argument("--interval", type=float, default=0.2, help="seconds between scripted phrases")
+    parser.add_argument("--delay", type=float, default=0.3, help="fake network delay per recognize/translate call")
+    args = parser.parse_args(argv)
+
+    from isl_gloss import gloss_doc, preprocess
+    from nlp_loader import get_nlp
+    from recognizers import StubRecognizer
+    from translation import DictionaryTranslator
+    from video_index import get_video_sequence
+
+    source = ScriptedSource(args.phrases, args.interval)
+    pipeline = SpeechPipeline(
+        listen=source.listen,
+        recognize=StubRecognizer(delay=args.delay).recognize,
+        translate=DictionaryTranslator({}, delay=args.delay).translate,
+        gloss=lambda text: gloss_doc(get_nlp()(preprocess(text))),
+        sequence=get_video_sequence,
+    ).start()
+    try:
+        for _ in args.phrases:
+            phrase = pipeline.get()
+            if phrase.error is not None:
+                print(f"⚠ {phrase.error_stage}: {phrase.error}")
+                continue
+            print(f"📝 {phrase.recognized!r} -> {phrase.gloss!r} ({len(phrase.sequence)} clips, {phrase.latency:.2f}s)")
+    finally:
+        pipeline.stop()
+    for line in pipeline.metrics.summary_lines():
+        print("⏱", line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
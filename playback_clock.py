@@ -0,0 +1,106 @@
+import os
+import time
+
+from metrics import metrics as default_metrics
+
+# Global playback speed multiplier (2.0 plays signs twice as fast)
+DEFAULT_SPEED = float(os.environ.get("ISL_PLAYBACK_SPEED", "1.0"))
+DEFAULT_FPS = 25.0
+
+
+class PlaybackClock:
+    # Schedules frames against absolute monotonic deadlines derived from each
+    # clip's real fps, so decode/encode time does not add up into drift.
+    # Deadlines carry over from clip to clip. When playback falls more than a
+    # frame behind, late frames are skipped to catch up. After a stall longer
+    # than max_lag the schedule is rebased instead of skipping a whole sign.
+    def __init__(self, speed=DEFAULT_SPEED, clip_gap=0.0, max_lag=0.5, metrics=None):
+        self.speed = speed if speed > 0 else 1.0
+        self.clip_gap = clip_gap
+        self.max_lag = max_lag
+        self.metrics = metrics or default_metrics
+        self.shown = 0
+        self.skipped = 0
+        self.target_frames = 0
+        self._frame_time = 0.0
+        self._gap_time = 0.0
+        self._started = None
+        self._deadline = None
+        self._due = None
+        self._interval = 1.0 / DEFAULT_FPS
+        self._index = 0
+        self._n_frames = 0
+
+    def start_clip(self, n_frames, fps):
+        now = time.monotonic()
+        self._interval = 1.0 / ((fps or DEFAULT_FPS) * self.speed)
+        self._n_frames = n_frames
+        self._index = 0
+        if self._deadline is None or now - self._deadline > self.max_lag:
+            self._deadline = now
+        if self._started is None:
+            self._started = self._deadline
+        else:
+            self._deadline += self.clip_gap / self.speed
+            self._gap_time += self.clip_gap / self.speed
+
+    def next_frame(self):
+        # (frame index, seconds to wait before showing it), or None once the
+        # clip is finished
+        if self._index >= self._n_frames:
+            return None
+        late = time.monotonic() - self._deadline
+        if late > self._interval:
+            skip = min(int(late / self._interval), self._n_frames - 1 - self._index)
+            if skip > 0:
+                self._index += skip
+                self._deadline += skip * self._interval
+                self.skipped += skip
+                self.target_frames += skip
+                self._frame_time += skip * self._interval
+        self._due = self._deadline
+        return self._index, max(0.0, self._deadline - time.monotonic())
+
+    def frame_shown(self):
+        now = time.monotonic()
+        if self._due is not None:
+            self.metrics.observe("frame_jitter", abs(now - self._due))
+        self.shown += 1
+        self.target_frames += 1
+        self._frame_time += self._interval
+        self._index += 1
+        self._deadline += self._interval
+
+    def frames(self, n_frames, fps):
+        # Blocking variant: yields the index of each frame to show, sleeping
+        # until its deadline; the caller displays it before asking for the next
+        self.start_clip(n_frames, fps)
+        while True:
+            step = self.next_frame()
+            if step is None:
+                return
+            index, wait = step
+            if wait > 0:
+                time.sleep(wait)
+            yield index
+            self.frame_shown()
+
+    def stats(self):
+        # Pauses between clips count towards neither rate
+        elapsed = (time.monotonic() - self._started - self._gap_time) if self._started is not None else 0.0
+        achieved = self.shown / elapsed if elapsed > 0 else 0.0
+        target = self.target_frames / self._frame_time if self._frame_time > 0 else 0.0
+        return {
+            "shown": self.shown,
+            "skipped": self.skipped,
+            "achieved_fps": achieved,
+            "target_fps": target,
+            "speed": self.speed,
+        }
+
+    def report(self):
+        stats = self.stats()
+        self.metrics.incr("frames_shown", stats["shown"])
+        self.metrics.incr("frames_skipped", stats["skipped"])
+        return (f"{stats['achieved_fps']:.1f}/{stats['target_fps']:.1f} fps"
+                f" ({stats['skipped']} frames skipped, speed x{stats['speed']:g})")
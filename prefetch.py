@@ -0,0 +1,106 @@
+import os
+import queue
+import threading
+from collections import deque
+
+from frame_cache import get_frame_cache
+
+# How many decoded clips may wait ahead of the one playing
+DEFAULT_AHEAD = int(os.environ.get("ISL_PREFETCH_AHEAD", "3"))
+
+NOT_READY = object()
+
+
+class ClipPrefetcher:
+    # Decodes the upcoming clips of a sequence on a worker thread into a
+    # bounded buffer, so moving to the next sign is a buffer swap rather than
+    # an open + decode. At most `ahead` decoded clips are held at once.
+    # Items are (path, clip); clip is None when the file could not be decoded.
+    def __init__(self, video_paths=(), ahead=DEFAULT_AHEAD, loader=None, open_ended=False):
+        self.loader = loader or get_frame_cache().get
+        self._paths = deque(video_paths)
+        self._ready = queue.Queue(maxsize=max(1, ahead))
+        self._cond = threading.Condition()
+        self._finished = not open_ended
+        self._closed = False
+        self._done = False
+        self._thread = threading.Thread(target=self._run, name="clip-prefetch", daemon=True)
+        self._thread.start()
+
+    def extend(self, video_paths):
+        # Appends clips to the end of the sequence (open-ended prefetchers)
+        with self._cond:
+            self._paths.extend(video_paths)
+            self._cond.notify()
+
+    def finish(self):
+        # No more clips will be added; iteration ends after the queued ones
+        with self._cond:
+            self._finished = True
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._paths.clear()
+            self._cond.notify()
+        # Unblock a worker waiting on a full buffer
+        try:
+            while True:
+                self._ready.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._paths and not self._finished and not self._closed:
+                    self._cond.wait()
+                if self._closed or not self._paths:
+                    break
+                path = self._paths.popleft()
+            item = (path, self.loader(path))
+            while not self._closed:
+                try:
+                    self._ready.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+        self._put_end()
+
+    def _put_end(self):
+        while not self._closed:
+            try:
+                self._ready.put(None, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def get(self, timeout=None):
+        # Next (path, clip) or None at the end; blocks until it is decoded
+        if self._done:
+            return None
+        item = self._ready.get(timeout=timeout)
+        if item is None:
+            self._done = True
+        return item
+
+    def poll(self):
+        # Non-blocking get for event loops: NOT_READY while still decoding
+        try:
+            return self.get(timeout=0)
+        except queue.Empty:
+            return NOT_READY
+
+    def __iter__(self):
+        while True:
+            item = self.get()
+            if item is None:
+                return
+            yield item
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
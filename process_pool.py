@@ -0,0 +1,149 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from frame_cache import Clip
+
+# Worker processes for gloss, clip decode and sentence encode in the
+# Streamlit server; 0 keeps all of it in the server process
+DEFAULT_PROCESSES = int(os.environ.get("ISL_PROCESSES", "0"))
+
+# Named segments outlive the worker's handle only on POSIX; elsewhere frames
+# come back pickled
+_USE_SHARED_MEMORY = os.name == "posix"
+
+
+# The server's frame store, opened again in each worker (same page cache)
+_store = None
+
+
+# --- Worker process ---
+def _init_worker(auto_download, store_path, base_dir):
+    global _store
+    import nlp_loader
+
+    nlp_loader.auto_download = auto_download
+    if store_path is not None:
+        from frame_store import FrameStore
+        _store = FrameStore(store_path, base_dir)
+
+
+def _gloss(texts):
+    from isl_core import gloss_many
+
+    return gloss_many(texts)
+
+
+def _decode(video_path, tier):
+    # The frames go into a new shared memory segment; only its name, the
+    # shape and the fps are pickled back. The segment stays registered with
+    # the (shared) resource tracker until the parent unlinks it, so it is
+    # cleaned up even if the parent never attaches.
+    from frame_cache import decode_clip
+
+    clip = decode_clip(video_path, tier)
+    if clip is None or not _USE_SHARED_MEMORY:
+        return clip
+    shm = shared_memory.SharedMemory(create=True, size=clip.frames.nbytes)
+    np.ndarray(clip.frames.shape, np.uint8, buffer=shm.buf)[:] = clip.frames
+    shm.close()
+    return shm.name, clip.frames.shape, clip.fps
+
+
+def _load(video_path, tier):
+    # Workers keep no frame cache or letter atlas of their own: clips come
+    # from the shared frame store or are decoded for the one job
+    from frame_cache import decode_clip
+
+    if _store is not None and _store.tier == tier:
+        clip = _store.get(video_path)
+        if clip is not None:
+            return clip
+    return decode_clip(video_path, tier)
+
+
+def _compose(key, video_paths, cache_dir, tier):
+    from compositor import write_sentence
+
+    clips = [clip for clip in (_load(path, tier) for path in video_paths) if clip is not None]
+    return write_sentence(key, clips, cache_dir) if clips else None
+
+
+# --- Server process ---
+class _SharedFrames:
+    # Owns an attached segment and the frames in it. Arrays made from it with
+    # np.asarray keep it as their base, so the segment stays mapped until the
+    # last view of the frames is gone and is closed then. The name is
+    # unlinked on attach; the mapping does not need it.
+    def __init__(self, name, shape):
+        self.shm = shared_memory.SharedMemory(name=name)
+        self.shm.unlink()
+        self.frames = np.ndarray(shape, np.uint8, buffer=self.shm.buf)
+        self.__array_interface__ = self.frames.__array_interface__
+
+    def __del__(self):
+        # Our own view has to go before the buffer can be released
+        self.frames = None
+        self.shm.close()
+
+
+def _attach(result):
+    if result is None or isinstance(result, Clip):
+        return result
+    name, shape, fps = result
+    return Clip(np.asarray(_SharedFrames(name, shape)), fps)
+
+
+class ProcessPool:
+    # Runs spaCy glossing, OpenCV decode and sentence encoding in separate
+    # processes so they scale with cores instead of sharing the server's GIL.
+    # Workers are spawned (not forked from the threaded server) and each keeps
+    # its own model and gloss memo, loaded on its first gloss job; frames are
+    # only cached by the server. Decoded frames come back through shared
+    # memory rather than being pickled. All calls block the calling thread
+    # until the job is done.
+    def __init__(self, processes=DEFAULT_PROCESSES, store=None):
+        import nlp_loader
+
+        self.processes = processes
+        initargs = (nlp_loader.auto_download, store.path if store is not None else None,
+                    store.base_dir if store is not None else None)
+        self.executor = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=_init_worker, initargs=initargs)
+        self.jobs = dict.fromkeys(("gloss", "decode", "compose"), 0)
+        self.shared_bytes = 0
+        self._lock = threading.Lock()
+
+    def _count(self, kind, nbytes=0):
+        with self._lock:
+            self.jobs[kind] += 1
+            self.shared_bytes += nbytes
+
+    def gloss_many(self, texts):
+        # texts: preprocessed; one job so the worker can batch them in nlp.pipe
+        self._count("gloss")
+        return self.executor.submit(_gloss, list(texts)).result()
+
+    def gloss(self, text):
+        return self.gloss_many([text])[0]
+
+    def decode(self, video_path, tier):
+        # Same contract as frame_cache.decode_clip, so it can be a FrameCache.decoder
+        clip = _attach(self.executor.submit(_decode, video_path, tier).result())
+        self._count("decode", clip.frames.nbytes if clip is not None and _USE_SHARED_MEMORY else 0)
+        return clip
+
+    def compose(self, key, video_paths, cache_dir, tier):
+        self._count("compose")
+        return self.executor.submit(_compose, key, list(video_paths), cache_dir, tier).result()
+
+    def stats(self):
+        with self._lock:
+            return {"processes": self.processes, "jobs": dict(self.jobs), "shared_bytes": self.shared_bytes}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,221 @@
+import json
+import os
+import threading
+import time
+
+import speech_recognition as sr
+
+from pipeline import SourceIdle
+
+# Backend selection: google (default), vosk (offline) or stub (deterministic)
+DEFAULT_BACKEND = os.environ.get("ISL_RECOGNIZER", "google")
+# Phrase segmentation for non-streaming backends: VAD on the raw stream, or
+# ISL_VAD=0 for speech_recognition's listen() with a fixed phrase time limit
+USE_VAD = os.environ.get("ISL_VAD", "1") != "0"
+
+
+class RecognizerBackend:
+    name = "base"
+    # Streaming backends decode audio while it is being captured and report
+    # partial transcripts, instead of waiting for a whole phrase.
+    streaming = False
+
+    def recognize(self, audio, language="en-IN"):
+        # audio: sr.AudioData for a complete phrase; returns the transcript
+        raise NotImplementedError
+
+    def start_stream(self, language="en-IN", sample_rate=16000):
+        # Returns a session with feed(chunk) -> (text, is_final)
+        raise NotImplementedError
+
+
+class GoogleBackend(RecognizerBackend):
+    name = "google"
+
+    def __init__(self, recognizer=None):
+        self.recognizer = recognizer or sr.Recognizer()
+
+    def recognize(self, audio, language="en-IN"):
+        return self.recognizer.recognize_google(audio, language=language)
+
+
+class _VoskSession:
+    def __init__(self, model, sample_rate):
+        from vosk import KaldiRecognizer
+        self.recognizer = KaldiRecognizer(model, sample_rate)
+
+    def feed(self, chunk):
+        if self.recognizer.AcceptWaveform(chunk):
+            return json.loads(self.recognizer.Result()).get("text", ""), True
+        return json.loads(self.recognizer.PartialResult()).get("partial", ""), False
+
+    def finish(self):
+        return json.loads(self.recognizer.FinalResult()).get("text", "")
+
+
+class VoskBackend(RecognizerBackend):
+    # Offline recognition with Vosk models. Models are looked up as
+    # $ISL_VOSK_MODEL_DIR/<language code> (e.g. models/hi-IN), falling back to
+    # the single model at $ISL_VOSK_MODEL.
+    name = "vosk"
+    streaming = True
+
+    def __init__(self, model_dir=None, default_model=None):
+        try:
+            import vosk
+        except ImportError as e:
+            raise RuntimeError("The vosk backend needs: pip install vosk") from e
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self.model_dir = model_dir or os.environ.get("ISL_VOSK_MODEL_DIR", "models")
+        self.default_model = default_model or os.environ.get("ISL_VOSK_MODEL")
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def model(self, language):
+        with self._lock:
+            if language not in self._models:
+                path = os.path.join(self.model_dir, language)
+                if not os.path.isdir(path):
+                    path = self.default_model
+                if not path or not os.path.isdir(path):
+                    raise sr.RequestError(f"No Vosk model for {language} (looked in {self.model_dir})")
+                self._models[language] = self._vosk.Model(path)
+            return self._models[language]
+
+    def start_stream(self, language="en-IN", sample_rate=16000):
+        return _VoskSession(self.model(language), sample_rate)
+
+    def recognize(self, audio, language="en-IN"):
+        session = self.start_stream(language, 16000)
+        session.feed(audio.get_raw_data(convert_rate=16000, convert_width=2))
+        text = session.finish()
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class _StubSession:
+    def __init__(self, backend, chunks_per_word):
+        self.words = backend.next_phrase().split()
+        self.chunks_per_word = chunks_per_word
+        self.fed = 0
+
+    def feed(self, chunk):
+        self.fed += 1
+        heard = min(len(self.words), self.fed // self.chunks_per_word)
+        return " ".join(self.words[:heard]), heard == len(self.words)
+
+    def finish(self):
+        return " ".join(self.words)
+
+
+class StubRecognizer(RecognizerBackend):
+    # Deterministic stand-in: returns scripted transcripts in order, ignoring
+    # the audio (text "audio" from pipeline.ScriptedSource is returned as is).
+    # Phrases come from a list or a transcript file with one phrase per line.
+    name = "stub"
+    streaming = False
+
+    def __init__(self, phrases=None, transcript=None, delay=0.0, chunks_per_word=4):
+        if transcript is None:
+            transcript = os.environ.get("ISL_STUB_TRANSCRIPT")
+        if phrases is None and transcript:
+            with open(transcript, encoding="utf-8") as f:
+                phrases = [line.strip() for line in f if line.strip()]
+        self.phrases = list(phrases or [])
+        self.delay = delay
+        self.chunks_per_word = chunks_per_word
+        self._position = 0
+        self._lock = threading.Lock()
+
+    def next_phrase(self):
+        with self._lock:
+            if not self.phrases:
+                raise sr.UnknownValueError()
+            phrase = self.phrases[self._position % len(self.phrases)]
+            self._position += 1
+            return phrase
+
+    def recognize(self, audio, language="en-IN"):
+        time.sleep(self.delay)
+        if isinstance(audio, str):
+            if not audio:
+                raise sr.UnknownValueError()
+            return audio
+        return self.next_phrase()
+
+    def start_stream(self, language="en-IN", sample_rate=16000):
+        return _StubSession(self, self.chunks_per_word)
+
+
+BACKENDS = {
+    "google": GoogleBackend,
+    "vosk": VoskBackend,
+    "stub": StubRecognizer,
+}
+
+
+def get_recognizer(name=None, recognizer=None):
+    name = (name or DEFAULT_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown recognizer backend {name!r}; choose from {', '.join(BACKENDS)}")
+    if name == "google":
+        return GoogleBackend(recognizer)
+    return BACKENDS[name]()
+
+
+class StreamingListener:
+    # Feeds raw microphone chunks to a streaming backend as they arrive and
+    # returns each utterance as soon as the backend finalizes it. Partial
+    # transcripts are passed to on_partial(text).
+    def __init__(self, backend, source, language="en-IN", on_partial=None, idle_timeout=1.0, max_phrase=15.0):
+        self.backend = backend
+        self.source = source
+        self.language = language
+        self.on_partial = on_partial
+        self.idle_timeout = idle_timeout
+        self.max_phrase = max_phrase
+        self._session = None
+        self._started = None
+        self._last_partial = ""
+
+    def listen(self):
+        deadline = time.monotonic() + self.idle_timeout
+        while True:
+            if self._session is None:
+                self._session = self.backend.start_stream(self.language, self.source.SAMPLE_RATE)
+                self._started = time.monotonic()
+                self._last_partial = ""
+            chunk = self.source.stream.read(self.source.CHUNK)
+            text, final = self._session.feed(chunk)
+            if not final and time.monotonic() - self._started > self.max_phrase:
+                text, final = self._session.finish(), True
+            if final:
+                self._session = None
+                if text:
+                    return text
+            elif text and text != self._last_partial:
+                self._last_partial = text
+                deadline = time.monotonic() + self.idle_timeout
+                if self.on_partial:
+                    self.on_partial(text)
+            if time.monotonic() > deadline and not self._last_partial:
+                # Let the caller check its stop flag between silent stretches
+                raise SourceIdle()
+
+
+def pipeline_callables(backend, recognizer, source, language, phrase_time_limit=3, on_partial=None, vad=USE_VAD):
+    # (listen, recognize) pair for SpeechPipeline. Streaming backends do the
+    # recognition while listening, so their recognize step is a pass-through.
+    # Others get phrases cut at real pauses by the VAD front end (vad.py);
+    # phrase_time_limit only applies to the listen() fallback.
+    if backend.streaming:
+        listener = StreamingListener(backend, source, language, on_partial)
+        return listener.listen, lambda text: text
+    if vad:
+        from vad import VADListener
+        listener = VADListener(source)
+        return listener.listen, lambda audio: backend.recognize(audio, language=language)
+    return (lambda: recognizer.listen(source, timeout=1, phrase_time_limit=phrase_time_limit),
+            lambda audio: backend.recognize(audio, language=language))
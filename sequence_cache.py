@@ -0,0 +1,207 @@
+import os
+import struct
+import threading
+from collections import OrderedDict, namedtuple
+
+from video_index import get_index, get_video_sequence as resolve_video_sequence
+
+DEFAULT_MAXSIZE = int(os.environ.get("ISL_SEQUENCE_CACHE_SIZE", "4096"))
+DEFAULT_FPS = 25.0
+
+# clips: tuple of clip paths in playback order; frames/duration: totals for
+# the whole sequence (duration in seconds at normal speed)
+Sequence = namedtuple("Sequence", ["clips", "frames", "duration"])
+
+
+def _boxes(data, start=0, end=None):
+    # (type, payload start, payload end) of the MP4 boxes in data[start:end]
+    end = len(data) if end is None else end
+    while start + 8 <= end:
+        size, kind = struct.unpack(">I4s", data[start:start + 8])
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", data[start + 8:start + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - start
+        if size < header:
+            return
+        yield kind, start + header, min(start + size, end)
+        start += size
+
+
+def _read_moov(f):
+    # The moov box may sit before or after the media data; skip to it
+    f.seek(0, os.SEEK_END)
+    file_size = f.tell()
+    offset = 0
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        size, kind = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header:
+            return None
+        if kind == b"moov":
+            return f.read(size - header)
+        offset += size
+    return None
+
+
+def mp4_info(video_path):
+    # (frame count, fps) of the first video track from the MP4 header alone:
+    # mdhd gives the track duration, stsz the number of samples (frames).
+    # None if the file cannot be parsed.
+    try:
+        with open(video_path, "rb") as f:
+            moov = _read_moov(f)
+    except OSError:
+        return None
+    if moov is None:
+        return None
+    for kind, start, end in _boxes(moov):
+        if kind != b"trak":
+            continue
+        trak = {k: (s, e) for k, s, e in _boxes(moov, start, end)}
+        mdia = {k: (s, e) for k, s, e in _boxes(moov, *trak.get(b"mdia", (0, 0)))}
+        hdlr, mdhd = mdia.get(b"hdlr"), mdia.get(b"mdhd")
+        if hdlr is None or mdhd is None or moov[hdlr[0] + 8:hdlr[0] + 12] != b"vide":
+            continue
+        minf = {k: (s, e) for k, s, e in _boxes(moov, *mdia.get(b"minf", (0, 0)))}
+        stbl = {k: (s, e) for k, s, e in _boxes(moov, *minf.get(b"stbl", (0, 0)))}
+        if b"stsz" not in stbl:
+            return None
+        if moov[mdhd[0]] == 1:
+            timescale, duration = struct.unpack(">IQ", moov[mdhd[0] + 20:mdhd[0] + 32])
+        else:
+            timescale, duration = struct.unpack(">II", moov[mdhd[0] + 12:mdhd[0] + 20])
+        frames = struct.unpack(">I", moov[stbl[b"stsz"][0] + 8:stbl[b"stsz"][0] + 12])[0]
+        if not timescale or not duration:
+            return None
+        return frames, frames / (duration / timescale)
+    return None
+
+
+def _probe(video_path):
+    # Frame count and fps without decoding or opening a capture; OpenCV is
+    # only asked about files whose header could not be read
+    info = mp4_info(video_path)
+    if info is not None:
+        return info
+    try:
+        import cv2
+    except ImportError:
+        return 0, DEFAULT_FPS
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return 0, DEFAULT_FPS
+        return int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0), cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+    finally:
+        cap.release()
+
+
+class SequenceCache:
+    # Normalized gloss -> resolved Sequence, LRU-bounded. Entries carry the
+    # total frames and duration so the UI can show progress up front. Clip
+    # lengths are read from the MP4 headers, once per clip, or taken from the
+    # letter atlas when one is attached (its letters may be trimmed).
+    # Everything is dropped when the video index reports a dataset change
+    # (its generation moves on).
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, atlas=None):
+        self.maxsize = maxsize
+        # Attached by frame_cache.get_frame_cache in processes that play video
+        self.atlas = atlas
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._clip_info = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def _check_generation(self, base_dir, index):
+        if self._generations.get(base_dir, index.generation) != index.generation:
+            self._entries = OrderedDict((key, seq) for key, seq in self._entries.items() if key[0] != base_dir)
+            self._clip_info.clear()
+            self.invalidations += 1
+        self._generations[base_dir] = index.generation
+
+    def clip_info(self, video_path):
+        info = self._clip_info.get(video_path)
+        if info is None:
+            # Letters may be trimmed in the atlas; use what will be played.
+            # Only asked once it is built, so a lookup never decodes.
+            atlas = self.atlas
+            letter = atlas is not None and video_path in atlas
+            clip = atlas.get(video_path) if letter and atlas.built else None
+            if clip is not None:
+                info = (len(clip.frames), clip.fps)
+            else:
+                info = _probe(video_path)
+                if letter and atlas.trim and not atlas.built:
+                    # Not remembered: the atlas may play a trimmed clip later
+                    return info
+            self._clip_info[video_path] = info
+        return info
+
+    def get(self, gloss_sentence, base_dir='datasets', partial_spelling=False):
+        index = get_index(base_dir)
+        key = (base_dir, bool(partial_spelling), " ".join(gloss_sentence.lower().split()))
+        with self._lock:
+            self._check_generation(base_dir, index)
+            sequence = self._entries.get(key)
+            if sequence is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return sequence
+            self.misses += 1
+
+        clips = tuple(resolve_video_sequence(key[2], base_dir=base_dir, partial_spelling=partial_spelling))
+        frames, duration = 0, 0.0
+        for video_path in clips:
+            count, fps = self.clip_info(video_path)
+            frames += count
+            duration += count / (fps or DEFAULT_FPS)
+        sequence = Sequence(clips, frames, duration)
+
+        with self._lock:
+            if self._generations.get(base_dir) == index.generation:
+                self._entries[key] = sequence
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return sequence
+
+    def attach(self, atlas):
+        # Lengths already read from the clips may not be what the atlas plays
+        with self._lock:
+            self.atlas = atlas
+            self._entries.clear()
+            self._clip_info.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._clip_info.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+# Shared by all entry points through isl_core.get_video_sequence
+sequence_cache = SequenceCache()
@@ -0,0 +1,366 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import WSMsgType, web
+
+from isl_core import gloss_many, get_video_sequence
+from isl_gloss import preprocess
+from partial_gloss import IncrementalGlosser
+from metrics import metrics
+from translation import Translator
+from video_index import LETTER_DIR, WORD_DIR
+
+# Headless API in front of isl_core: text or streamed audio in, gloss plus
+# clip references (or JPEG frames) out. Run with `python -m service`.
+
+BASE_DIR = os.environ.get("ISL_DATASET_DIR", "datasets")
+# Requests running at once, and how many more may wait before we answer 503
+MAX_CONCURRENT = int(os.environ.get("ISL_SERVICE_CONCURRENCY", "8"))
+MAX_WAITING = int(os.environ.get("ISL_SERVICE_QUEUE", "64"))
+# Gloss requests arriving within this window share one nlp.pipe call
+BATCH_WINDOW = float(os.environ.get("ISL_SERVICE_BATCH_MS", "5")) / 1000.0
+MAX_BATCH = int(os.environ.get("ISL_SERVICE_BATCH_SIZE", "64"))
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+CLIP_DIRS = {"words": WORD_DIR, "letters": LETTER_DIR}
+
+
+class GlossBatcher:
+    # Collects gloss requests for a few milliseconds and runs them through
+    # the model as one batch on the executor
+    def __init__(self, executor, window=BATCH_WINDOW, max_batch=MAX_BATCH):
+        self.executor = executor
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = []
+        self._flush_handle = None
+
+    async def gloss(self, text):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((preprocess(text), future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        texts = [text for text, _ in batch]
+        metrics.observe("gloss_batch_size", len(texts))
+        start = time.perf_counter()
+        try:
+            glosses = await asyncio.get_running_loop().run_in_executor(self.executor, gloss_many, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        metrics.observe("gloss", time.perf_counter() - start)
+        for (_, future), gloss in zip(batch, glosses):
+            if not future.done():
+                future.set_result(gloss)
+
+
+class SignService:
+    def __init__(self, base_dir=BASE_DIR, translator=None, workers=None,
+                 max_concurrent=MAX_CONCURRENT, max_waiting=MAX_WAITING):
+        self.base_dir = base_dir
+        self.translator = translator or Translator()
+        self.executor = ThreadPoolExecutor(max_workers=workers or max_concurrent, thread_name_prefix="service")
+        self.batcher = GlossBatcher(self.executor)
+        self.limit = asyncio.Semaphore(max_concurrent)
+        self.max_waiting = max_waiting
+        self.waiting = 0
+        self.started = time.time()
+
+    async def run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def admit(self):
+        # Returns False (caller answers 503) when too many requests are queued
+        if self.limit.locked() and self.waiting >= self.max_waiting:
+            metrics.incr("service_rejected")
+            return False
+        self.waiting += 1
+        try:
+            await self.limit.acquire()
+        finally:
+            self.waiting -= 1
+        return True
+
+    def clip_ref(self, path):
+        kind = "letters" if os.path.dirname(path).endswith(LETTER_DIR) else "words"
+        return {"kind": kind, "name": os.path.basename(path), "url": f"/clips/{kind}/{os.path.basename(path)}"}
+
+    async def sign(self, text, lang_code="en-IN", partial_spelling=False):
+        start = time.perf_counter()
+        translated = await self.run(self.translator.translate, text, lang_code)
+        gloss = await self.batcher.gloss(translated)
+        # May probe clip metadata on a miss; kept off the event loop
+        videos = await self.run(get_video_sequence, gloss, self.base_dir, partial_spelling)
+        metrics.observe("service_request", time.perf_counter() - start)
+        return {
+            "text": text,
+            "translated": translated,
+            "gloss": gloss,
+            "clips": [self.clip_ref(path) for path in videos],
+        }
+
+    # --- HTTP handlers ---
+    async def _json_body(self, request):
+        try:
+            body = await request.json()
+        except ValueError:
+            # Bad JSON, or a body that is not valid UTF-8
+            raise web.HTTPBadRequest(text="expected a JSON body")
+        if not isinstance(body, dict):
+            raise web.HTTPBadRequest(text="expected a JSON object")
+        return body
+
+    async def handle_sign(self, request):
+        body = await self._json_body(request)
+        text = (body.get("text") or "").strip()
+        if not text:
+            raise web.HTTPBadRequest(text="'text' is required")
+        if not await self.admit():
+            raise web.HTTPServiceUnavailable(text="too many requests queued")
+        try:
+            result = await self.sign(text, body.get("language", "en-IN"), bool(body.get("partial_spelling")))
+        finally:
+            self.limit.release()
+        return web.json_response(result)
+
+    async def handle_gloss(self, request):
+        body = await self._json_body(request)
+        texts = body.get("texts")
+        if not isinstance(texts, list):
+            raise web.HTTPBadRequest(text="'texts' must be a list of English strings")
+        if not await self.admit():
+            raise web.HTTPServiceUnavailable(text="too many requests queued")
+        try:
+            glosses = await self.run(gloss_many, [preprocess(str(text)) for text in texts])
+        finally:
+            self.limit.release()
+        return web.json_response({"glosses": glosses})
+
+    async def handle_clip(self, request):
+        directory = CLIP_DIRS.get(request.match_info["kind"])
+        name = os.path.basename(request.match_info["name"])
+        path = os.path.join(self.base_dir, directory, name) if directory else None
+        if path is None or not os.path.isfile(path):
+            raise web.HTTPNotFound()
+        return web.FileResponse(path)
+
+    async def handle_health(self, request):
+        return web.json_response({"status": "ok", "uptime": time.time() - self.started,
+                                  "waiting": self.waiting, "translations": self.translator.stats()})
+
+    async def handle_metrics(self, request):
+        return web.Response(text=metrics.to_prometheus(), content_type="text/plain")
+
+    async def handle_metrics_json(self, request):
+        return web.Response(text=metrics.to_json(), content_type="application/json")
+
+    # --- WebSocket ---
+    async def handle_stream(self, request):
+        # Messages in: {"type": "text", "text": ..., "language": ...},
+        # {"type": "start", "language": ..., "frames": bool}, binary PCM16
+        # mono 16 kHz audio chunks, then {"type": "end"}.
+        # Messages out: {"type": "partial"}, {"type": "result"} and, with
+        # frames on, {"type": "frame", ...} headers each followed by a JPEG.
+        # With "partial_signs" on (English, streaming recognizer), stable
+        # words are sent as {"type": "signs"} while the phrase is spoken.
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        stream = _AudioStream(self)
+        async for msg in ws:
+            if msg.type == WSMsgType.BINARY:
+                partial = await stream.feed(msg.data)
+                if partial:
+                    await ws.send_json({"type": "partial", "text": partial})
+                    if stream.glosser is not None:
+                        await self._send_signs(ws, await self.run(stream.glosser.update, partial))
+                continue
+            if msg.type != WSMsgType.TEXT:
+                continue
+            try:
+                data = json.loads(msg.data)
+            except json.JSONDecodeError:
+                data = None
+            if not isinstance(data, dict):
+                await ws.send_json({"type": "error", "error": "expected a JSON object"})
+                continue
+            kind = data.get("type", "text")
+            if kind == "start":
+                stream.start(data.get("language", "en-IN"), bool(data.get("frames")), bool(data.get("partial_signs")))
+            elif kind == "end":
+                text = await stream.finish()
+                if text and stream.glosser is not None:
+                    await self._send_signs(ws, await self.run(stream.glosser.finish, text), final=True)
+                if text:
+                    await self._send_result(ws, text, stream.language, stream.frames)
+                else:
+                    await ws.send_json({"type": "result", "text": "", "error": "no speech recognized"})
+            elif kind == "text":
+                await self._send_result(ws, data.get("text", ""), data.get("language", "en-IN"),
+                                        bool(data.get("frames")))
+        stream.close()
+        return ws
+
+    async def _send_signs(self, ws, words, final=False):
+        if not words and not final:
+            return
+        videos = await self.run(get_video_sequence, " ".join(words), self.base_dir)
+        await ws.send_json({"type": "signs", "gloss": " ".join(words), "final": final,
+                            "clips": [self.clip_ref(path) for path in videos]})
+
+    async def _send_result(self, ws, text, lang_code, frames):
+        if not text.strip():
+            await ws.send_json({"type": "error", "error": "'text' is required"})
+            return
+        if not await self.admit():
+            await ws.send_json({"type": "error", "error": "too many requests queued"})
+            return
+        try:
+            result = await self.sign(text, lang_code)
+            await ws.send_json(dict(result, type="result"))
+            if frames:
+                await self._send_frames(ws, result["clips"])
+        finally:
+            self.limit.release()
+
+    async def _send_frames(self, ws, clips):
+        from frame_cache import get_frame_cache
+        import cv2
+
+        cache = get_frame_cache(self.base_dir)
+        for number, ref in enumerate(clips):
+            path = os.path.join(self.base_dir, CLIP_DIRS[ref["kind"]], ref["name"])
+            clip = await self.run(cache.get, path)
+            if clip is None:
+                continue
+            for index, frame in enumerate(clip.frames):
+                image = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+                ok, jpeg = await self.run(cv2.imencode, ".jpg", image)
+                if not ok:
+                    continue
+                await ws.send_json({"type": "frame", "clip": number, "index": index, "fps": clip.fps})
+                await ws.send_bytes(jpeg.tobytes())
+        await ws.send_json({"type": "frames_end"})
+
+
+class _AudioStream:
+    # Audio of one WebSocket phrase. Streaming recognizers (Vosk) decode the
+    # chunks as they arrive; others get the whole phrase at "end".
+    def __init__(self, service):
+        self.service = service
+        self.language = "en-IN"
+        self.frames = False
+        self.glosser = None
+        self._backend = None
+        self._session = None
+        self._chunks = []
+        self._final = []
+
+    def start(self, language, frames=False, partial_signs=False):
+        from recognizers import get_recognizer
+
+        self.language = language
+        self.frames = frames
+        self._backend = self._backend or get_recognizer()
+        self._session = self._backend.start_stream(language, SAMPLE_RATE) if self._backend.streaming else None
+        # Partial gloss needs partial transcripts and English gloss rules
+        streaming = self._session is not None and language.startswith("en")
+        self.glosser = IncrementalGlosser() if partial_signs and streaming else None
+        self._chunks = []
+        self._final = []
+
+    async def feed(self, chunk):
+        if self._backend is None:
+            self.start(self.language)
+        if self._session is None:
+            self._chunks.append(chunk)
+            return None
+        text, is_final = await self.service.run(self._session.feed, chunk)
+        if is_final:
+            if text:
+                self._final.append(text)
+            return " ".join(self._final)
+        return " ".join(self._final + [text]).strip()
+
+    async def finish(self):
+        import speech_recognition as sr
+
+        if self._backend is None:
+            return ""
+        try:
+            if self._session is not None:
+                tail = await self.service.run(self._session.finish)
+                return " ".join(self._final + [tail]).strip()
+            if not self._chunks:
+                return ""
+            audio = sr.AudioData(b"".join(self._chunks), SAMPLE_RATE, SAMPLE_WIDTH)
+            try:
+                return await self.service.run(self._backend.recognize, audio, self.language)
+            except sr.UnknownValueError:
+                return ""
+        finally:
+            self._session = None
+            self._chunks = []
+            self._final = []
+
+    def close(self):
+        self._session = None
+        self._chunks = []
+
+
+def create_app(service=None):
+    app = web.Application(client_max_size=8 * 1024 * 1024)
+
+    async def on_startup(app):
+        app["service"] = service or SignService()
+
+    async def on_cleanup(app):
+        app["service"].executor.shutdown(wait=False)
+
+    def route(name):
+        async def handler(request):
+            return await getattr(request.app["service"], name)(request)
+        return handler
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.router.add_get("/healthz", route("handle_health"))
+    app.router.add_get("/metrics", route("handle_metrics"))
+    app.router.add_get("/metrics.json", route("handle_metrics_json"))
+    app.router.add_post("/v1/sign", route("handle_sign"))
+    app.router.add_post("/v1/gloss", route("handle_gloss"))
+    app.router.add_get("/v1/stream", route("handle_stream"))
+    app.router.add_get("/clips/{kind}/{name}", route("handle_clip"))
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP/WebSocket API for text/speech -> ISL gloss and clips")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("ISL_SERVICE_PORT", "8080")))
+    args = parser.parse_args(argv)
+    print(f"🌐 ISL service on http://{args.host}:{args.port}")
+    web.run_app(create_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from frame_cache import get_frame_cache
+from gloss_cache import gloss_cache as default_gloss_cache
+from process_pool import DEFAULT_PROCESSES, ProcessPool
+
+DEFAULT_WORKERS = int(os.environ.get("ISL_WORKERS", str(min(8, (os.cpu_count() or 2)))))
+# Sessions idle for longer than this are dropped from the accounting table
+SESSION_TTL = float(os.environ.get("ISL_SESSION_TTL", "3600"))
+
+COUNTERS = ("phrases", "gloss_hits", "gloss_misses", "translations", "clips_cached", "clips_decoded",
+            "frame_bytes", "work_seconds")
+
+
+class SessionStats:
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.started = time.time()
+        self.last_seen = self.started
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def as_dict(self):
+        return dict(self.counters, session_id=self.session_id, started=self.started, last_seen=self.last_seen)
+
+
+class SharedResources:
+    # Process-wide state shared by every browser session of one Streamlit
+    # server: decoded clips (frame cache, LRU under its byte budget), the gloss
+    # memo, the translator with its on-disk cache, and one worker pool. Each
+    # call is charged to the calling session so usage can be compared. With
+    # processes > 0, gloss misses, clip decodes and sentence encodes run in a
+    # process pool (see process_pool.py) instead of on this process's threads.
+    def __init__(self, frame_cache=None, gloss_cache=None, translator=None, workers=DEFAULT_WORKERS,
+                 processes=DEFAULT_PROCESSES):
+        from compositor import SentenceCompositor
+        from translation import Translator
+
+        self.frame_cache = frame_cache or get_frame_cache()
+        self.gloss_cache = gloss_cache or default_gloss_cache
+        self.translator = translator or Translator()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shared")
+        self.pool = None
+        if processes > 0:
+            self.pool = ProcessPool(processes, store=self.frame_cache.store)
+            self.frame_cache.decoder = self.pool.decode
+        self.compositor = SentenceCompositor(frame_cache=self.frame_cache, executor=self.executor, pool=self.pool)
+        self.workers = workers
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    # --- Accounting ---
+    def session(self, session_id):
+        now = time.time()
+        with self._lock:
+            stats = self._sessions.get(session_id)
+            if stats is None:
+                stats = self._sessions[session_id] = SessionStats(session_id)
+                self._expire(now)
+            stats.last_seen = now
+            return stats
+
+    def _expire(self, now):
+        for session_id, stats in list(self._sessions.items()):
+            if now - stats.last_seen > SESSION_TTL:
+                del self._sessions[session_id]
+
+    def charge(self, session_id, **amounts):
+        stats = self.session(session_id)
+        with self._lock:
+            for name, amount in amounts.items():
+                stats.counters[name] += amount
+
+    # --- Shared operations ---
+    def gloss(self, session_id, text, gloss_fn):
+        # gloss_fn: the raw (un-memoized) text -> gloss function
+        start = time.perf_counter()
+        gloss = self.gloss_cache.get(text)
+        if gloss is not None:
+            self.charge(session_id, gloss_hits=1)
+            return gloss
+        gloss = self.pool.gloss(text) if self.pool is not None else gloss_fn(text)
+        self.gloss_cache.put(text, gloss)
+        self.charge(session_id, gloss_misses=1, work_seconds=time.perf_counter() - start)
+        return gloss
+
+    def translate(self, session_id, text, lang_code):
+        start = time.perf_counter()
+        translated = self.translator.translate(text, lang_code)
+        self.charge(session_id, translations=1, work_seconds=time.perf_counter() - start)
+        return translated
+
+    def clip(self, session_id, video_path):
+        start = time.perf_counter()
+        cached = video_path in self.frame_cache
+        clip = self.frame_cache.get(video_path)
+        if clip is not None:
+            if cached:
+                self.charge(session_id, clips_cached=1)
+            else:
+                self.charge(session_id, clips_decoded=1, frame_bytes=clip.frames.nbytes,
+                            work_seconds=time.perf_counter() - start)
+        return clip
+
+    def compose(self, session_id, video_paths):
+        # The stitched sentence (path, mime type) or None; the wait is charged
+        start = time.perf_counter()
+        try:
+            return self.compositor.compose(video_paths).result()
+        finally:
+            self.charge(session_id, work_seconds=time.perf_counter() - start)
+
+    def stats(self):
+        with self._lock:
+            sessions = [stats.as_dict() for stats in self._sessions.values()]
+        return {
+            "sessions": sessions,
+            "active_sessions": len(sessions),
+            "workers": self.workers,
+            "process_pool": self.pool.stats() if self.pool is not None else None,
+            "frame_cache": self.frame_cache.stats(),
+            "gloss_cache": self.gloss_cache.stats(),
+            "translations": self.translator.stats(),
+        }
+
+
+_resources = None
+_resources_lock = threading.Lock()
+
+
+def get_shared_resources():
+    global _resources
+    with _resources_lock:
+        if _resources is None:
+            _resources = SharedResources()
+        return _resources
@@ -1,102 +1,88 @@
+import time
+_startup = time.perf_counter()
+
 import speech_recognition as sr
 # from googletrans import Translator
-from deep_translator import GoogleTranslator
 import keyboard
 import threading
-import spacy
-import re
-
-# Load spaCy English model
-try:
-    nlp = spacy.load("en_core_web_sm")
-except:
-    print("⚠ Please run: python -m spacy download en_core_web_sm")
-    exit()
+from gloss_cache import gloss_cache
+from isl_core import LANGUAGE_MAP, isl_gloss_spacy, preprocess
+from nlp_loader import report_startup
+from pipeline import SourceIdle, SpeechPipeline
+from recognizers import get_recognizer, pipeline_callables
+from translation import Translator
+from metrics import metrics, serve_metrics
+from warm_cache import warm_start
 
 # Initialize recognizer and translator
 recognizer = sr.Recognizer()
-# translator = Translator()
+# Google by default; set ISL_RECOGNIZER=vosk for offline recognition
+speech_backend = get_recognizer(recognizer=recognizer)
+# English passes through; other languages hit the on-disk cache before Google
+translator = Translator()
+
+# Gloss memo from the last run; saved again on exit
+warm_start('datasets', posters=False)
 
 # Supported language codes
-language_map = {
-    "english": "en-IN",
-    "tamil": "ta-IN",
-    "telugu": "te-IN",
-    "hindi": "hi-IN"
-}
+language_map = {name.lower(): code for name, code in LANGUAGE_MAP.items()}
 
 def get_language():
     print("Available: English / Tamil / Telugu / Hindi")
     lang = input("🗣 Speak in: ").strip().lower()
     return language_map.get(lang, "en-IN")
 
-def preprocess(text):
-    text = re.sub(r'[^\w\s]', '', text.lower())
-    return text
-
-def isl_gloss_spacy(text):
-    doc = nlp(text)
-    important_words = []
-    tense_marker = ""
-
-    keep_words = {"left", "right", "back", "forward", "up", "down", "near", "on", "in", "under", "to", "from"}
-
-    for token in doc:
-        if token.text.lower() in keep_words:
-            important_words.append(token.text.lower())
-        elif token.pos_ == "AUX" and token.lemma_ == "will":
-            tense_marker = "FUTURE"
-        elif token.pos_ in {"AUX", "DET", "ADP"}:
-            continue
-        elif token.tag_ in {"VBD", "VBN"}:
-            tense_marker = "PAST"
-            important_words.append(token.lemma_)
-        else:
-            important_words.append(token.lemma_)
-
-    if tense_marker:
-        important_words.append(tense_marker)
-
-    return ' '.join(important_words).lower()
-
 def continuous_listen(lang_code, stop_flag):
     full_transcript = []
 
     print("\n🎤 Listening... Press Enter to stop.\n")
     with sr.Microphone() as source:
         recognizer.adjust_for_ambient_noise(source)
-        while not stop_flag["stop"]:
-            try:
-                audio = recognizer.listen(source, timeout=1, phrase_time_limit=3)
-                recognized = recognizer.recognize_google(audio, language=lang_code)
-                print("🗣 Recognized:", recognized)
-
-                # src = lang_code.split('-')[0]
-                # translated = translator.translate(recognized, src=src, dest="en")
-                translated_text = GoogleTranslator(source='auto', target='en').translate(recognized)
-                print("🌐 Translated:", translated_text)
-
-                processed = preprocess(translated_text)
-                gloss = isl_gloss_spacy(processed)
-                full_transcript.append(translated_text)
-
-                print("📝 ISL Gloss:", gloss)
-
-            except sr.WaitTimeoutError:
-                continue
-            except sr.UnknownValueError:
-                print("⚠ Couldn’t understand...")
-            except sr.RequestError as e:
-                print(f"⚠ API Error: {e}")
-            except Exception as e:
-                print(f"💥 Unexpected error: {e}")
+        listen, recognize = pipeline_callables(
+            speech_backend, recognizer, source, lang_code, phrase_time_limit=3,
+            on_partial=lambda text: print("…", text))
+        pipeline = SpeechPipeline(
+            listen=listen,
+            recognize=recognize,
+            translate=lambda text: translator.translate(text, lang_code),
+            gloss=lambda text: isl_gloss_spacy(preprocess(text)),
+            idle_exceptions=(sr.WaitTimeoutError, SourceIdle),
+        ).start()
+        try:
+            while not stop_flag["stop"]:
+                phrase = pipeline.get(timeout=0.5)
+                if phrase is None:
+                    continue
+                try:
+                    if phrase.error is not None:
+                        raise phrase.error
+                    print("🗣 Recognized:", phrase.recognized)
+                    print("🌐 Translated:", phrase.translated)
+                    full_transcript.append(phrase.translated)
+                    print("📝 ISL Gloss:", phrase.gloss)
+
+                except sr.UnknownValueError:
+                    print("⚠ Couldn’t understand...")
+                except sr.RequestError as e:
+                    print(f"⚠ API Error: {e}")
+                except Exception as e:
+                    print(f"💥 Unexpected error: {e}")
+        finally:
+            pipeline.stop()
 
     final_text = ' '.join(full_transcript)
     final_gloss = isl_gloss_spacy(preprocess(final_text))
     print("\n📄 Final Transcript:", final_text)
     print("📝 Final ISL Gloss:", final_gloss)
+    stats = gloss_cache.stats()
+    print(f"🧠 Gloss cache: {stats['hits']} hits / {stats['misses']} misses")
+    for line in metrics.summary_lines():
+        print(f"📊 {line}")
 
 if __name__ == "__main__":
+    report_startup("sst.py", _startup)
+    # Set ISL_METRICS_PORT to expose /metrics and /metrics.json
+    serve_metrics()
     lang_code = get_language()
     stop_flag = {"stop": False}
 
@@ -1,13 +1,22 @@
+import time
+_startup = time.perf_counter()
+
 # import streamlit as st
 import streamlit as st
 import speech_recognition as sr
-from deep_translator import GoogleTranslator
-import spacy
-import re
-import os
-import cv2
-import time
-from PIL import Image
+import uuid
+from video_index import get_index
+from isl_core import LANGUAGE_MAP, get_video_sequence as core_video_sequence, isl_gloss_spacy, preprocess, sequence_info
+from sequence_cache import sequence_cache
+from shared_resources import get_shared_resources
+from pipeline import SourceIdle, SpeechPipeline
+from recognizers import get_recognizer, pipeline_callables
+from metrics import metrics, serve_metrics
+from playback_clock import PlaybackClock
+from prefetch import ClipPrefetcher
+import nlp_loader
+from nlp_loader import report_startup
+from warm_cache import warm_start
 
 # --- Page Config ---
 st.set_page_config(
@@ -126,89 +135,123 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- Load Resources (Cached) ---
+# The spaCy model loads on the first gloss; fetch it automatically if missing
+nlp_loader.auto_download = True
+
 @st.cache_resource
-def load_spacy_model():
-    try:
-        return spacy.load("en_core_web_sm")
-    except OSError:
-        os.system("python -m spacy download en_core_web_sm")
-        return spacy.load("en_core_web_sm")
+def load_warm_cache():
+    # Index, gloss memo and clip posters from the last run
+    return warm_start('datasets')
+
+@st.cache_resource
+def load_video_index():
+    index = get_index('datasets')
+    index.watch()
+    return index
+
+@st.cache_resource
+def load_shared_resources():
+    # One decoded-clip store, gloss/translation cache and worker pool for all sessions
+    return get_shared_resources()
 
-nlp = load_spacy_model()
+warm = load_warm_cache()
+load_video_index()
+resources = load_shared_resources()
 # translator = Translator() # Removed googletrans
 recognizer = sr.Recognizer()
 
-# --- Constants & Mappings ---
-LANGUAGE_MAP = {
-    "English": "en-IN",
-    "Tamil": "ta-IN",
-    "Telugu": "te-IN",
-    "Hindi": "hi-IN"
-}
-
-# --- Helper Functions ---
-def preprocess(text):
-    return re.sub(r'[^\w\s]', '', text.lower())
-
-def isl_gloss_spacy(text):
-    doc = nlp(text)
-    important_words = []
-    tense_marker = ""
-    keep_words = {"left", "right", "back", "forward", "up", "down", "near", "on", "in", "under", "to", "from"}
-
-    for token in doc:
-        if token.text.lower() in keep_words:
-            important_words.append(token.text.lower())
-        elif token.pos_ == "AUX" and token.lemma_ == "will":
-            tense_marker = "FUTURE"
-        elif token.pos_ in {"AUX", "DET", "ADP"}:
-            continue
-        elif token.tag_ in {"VBD", "VBN"}:
-            tense_marker = "PAST"
-            important_words.append(token.lemma_)
-        else:
-            important_words.append(token.lemma_)
+@st.cache_resource
+def load_speech_backend():
+    # Google by default; set ISL_RECOGNIZER=vosk for offline recognition
+    return get_recognizer(recognizer=sr.Recognizer())
 
-    if tense_marker:
-        important_words.append(tense_marker)
+@st.cache_resource
+def start_metrics_server():
+    # Set ISL_METRICS_PORT to expose /metrics and /metrics.json
+    return serve_metrics()
 
-    return ' '.join(important_words).lower()
+speech_backend = load_speech_backend()
+start_metrics_server()
 
+# --- Constants & Mappings ---
 def get_video_sequence(gloss_sentence, base_dir='datasets'):
-    full_word_dir = os.path.join(base_dir, 'full_word_videos')
-    letter_dir = os.path.join(base_dir, 'letters')
-    video_sequence = []
-
-    for word in gloss_sentence.lower().split():
-        word_video = os.path.join(full_word_dir, f"{word}.mp4")
-        if os.path.exists(word_video):
-            video_sequence.append(word_video)
-        else:
-            for letter in word:
-                letter_video = os.path.join(letter_dir, f"{letter}.mp4")
-                if os.path.exists(letter_video):
-                    video_sequence.append(letter_video)
-    return video_sequence
+    # The web UI keeps the letters it can spell even if a word has unknown characters
+    return core_video_sequence(gloss_sentence, base_dir=base_dir, partial_spelling=True)
 
-def play_video_sequence(video_paths, placeholder):
+def show_poster(video_path, placeholder):
+    # The clip's first frame from the warm cache, on screen before anything is decoded
+    poster = warm.poster(video_path)
+    if poster is not None:
+        placeholder.image(poster, channels="RGB", width=resources.frame_cache.tier.width)
+
+def play_video_sequence(video_paths, placeholder, on_first_frame=None, session_id=None):
     if not video_paths:
         placeholder.warning("No matching videos found for the generated gloss.")
         return
 
-    for video_path in video_paths:
-        cap = cv2.VideoCapture(video_path)
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            # Convert BGR to RGB
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            placeholder.image(frame, channels="RGB", use_container_width=True)
-            time.sleep(0.04) # Adjust speed slightly smoother
-        cap.release()
+    # Frames follow each clip's real fps (times ISL_PLAYBACK_SPEED); late frames are skipped
+    clock = PlaybackClock()
+    show_poster(video_paths[0], placeholder)
+    # The next clips are decoded on a worker (through the frame cache) while this one plays
+    with ClipPrefetcher(video_paths, loader=lambda path: resources.clip(session_id, path)) as clips:
+        for video_path, clip in clips:
+            if clip is None:
+                continue
+            for index in clock.frames(len(clip.frames), clip.fps):
+                # Sent at the display tier's size rather than stretched to the column
+                placeholder.image(clip.frames[index], channels="RGB", width=resources.frame_cache.tier.width)
+                if on_first_frame is not None:
+                    on_first_frame()
+                    on_first_frame = None
+    print(f"▶ Playback: {clock.report()}")
+
+def play_sentence(video_paths, placeholder, on_first_frame=None, session_id=None):
+    # Shows the whole gloss as one stitched clip; falls back to pushing frames
+    # one by one if composition fails. Returns True when a video was shown.
+    if not video_paths:
+        placeholder.warning("No matching videos found for the generated gloss.")
+        return False
+    show_poster(video_paths[0], placeholder)
+    try:
+        result = resources.compose(session_id, video_paths)
+    except Exception as e:
+        print(f"⚠ Sentence composition failed: {e}")
+        result = None
+    if result is None:
+        play_video_sequence(video_paths, placeholder, on_first_frame, session_id)
+        return False
+    clip_path, mime = result
+    placeholder.video(clip_path, format=mime, autoplay=True)
+    if on_first_frame is not None:
+        on_first_frame()
+    return True
+
+def render_metrics(placeholder, session_id):
+    lines = metrics.summary_lines()
+    usage = resources.session(session_id).counters
+    shared = resources.stats()
+    cache = shared["frame_cache"]
+    sequences = sequence_cache.stats()
+    lines += [
+        f"this session: {usage['phrases']} phrases · {usage['gloss_hits']}/{usage['gloss_hits'] + usage['gloss_misses']} gloss hits"
+        f" · {usage['clips_decoded']} clips decoded · {usage['clips_cached']} cached · {usage['work_seconds']:.1f}s CPU",
+        f"server: {shared['active_sessions']} sessions · frame cache {cache['bytes'] / 2**20:.0f}/{cache['budget'] / 2**20:.0f} MB"
+        f" · sequence cache {sequences['hit_rate']:.0%} hits",
+    ]
+    pool = shared["process_pool"]
+    if pool is not None:
+        jobs = pool["jobs"]
+        lines.append(f"process pool: {pool['processes']} processes · {jobs['gloss']} glosses · {jobs['decode']} decodes"
+                     f" · {jobs['compose']} encodes · {pool['shared_bytes'] / 2**20:.0f} MB via shared memory")
+    placeholder.markdown("\n".join(f"- `{line}`" for line in lines))
 
 # --- Main App ---
 def main():
+    # Resources are shared across browser sessions; usage is accounted per session
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    session_id = st.session_state.session_id
+
     # Sidebar
     with st.sidebar:
         st.image("https://cdn-icons-png.flaticon.com/512/2620/2620619.png", width=80) 
@@ -239,6 +282,11 @@ def main():
             </div>
             ''', unsafe_allow_html=True)
 
+        st.markdown("---")
+        st.markdown("### 📊 Latency")
+        metrics_placeholder = st.empty()
+        render_metrics(metrics_placeholder, session_id)
+
         st.markdown("---")
         st.caption("v1.0.0 | Built with Streamlit")
 
@@ -303,69 +351,94 @@ def main():
         try:
             with sr.Microphone() as source:
                 recognizer.adjust_for_ambient_noise(source)
+
+                # Listen / recognize / translate / gloss run on pipeline threads,
+                # so the mic keeps being read while this thread renders and plays.
+                listen, recognize = pipeline_callables(speech_backend, recognizer, source, lang_code, phrase_time_limit=5)
+                pipeline = SpeechPipeline(
+                    listen=listen,
+                    recognize=recognize,
+                    translate=lambda text: resources.translate(session_id, text, lang_code),
+                    gloss=lambda text: resources.gloss(session_id, preprocess(text), isl_gloss_spacy.__wrapped__),
+                    sequence=get_video_sequence,
+                    idle_exceptions=(sr.WaitTimeoutError, SourceIdle),
+                ).start()
                 
                 # Processing loop (Single phrase per loop iteration to allow UI refresh on re-run)
-                while st.session_state.listening:
-                    try:
-                        # Listen
-                        audio = recognizer.listen(source, timeout=1, phrase_time_limit=5)
+                try:
+                    while st.session_state.listening:
+                        phrase = pipeline.get(timeout=0.5)
+                        if phrase is None:
+                            continue
+                        try:
+                            if phrase.error is not None:
+                                raise phrase.error
+                            recognized_text = phrase.recognized
+                            translated_text = phrase.translated
+                            gloss_text = phrase.gloss
+                            # Cached with the sequence; no clip has to be opened for it
+                            info = sequence_info(gloss_text, partial_spelling=True)
                         
-                        # Recognize
-                        recognized_text = recognizer.recognize_google(audio, language=lang_code)
-                        
-                        # Translate
-                        src_lang = lang_code.split('-')[0]
-                        translated_text = GoogleTranslator(source='auto', target='en').translate(recognized_text)
-                        
-                        # Gloss
-                        processed_text = preprocess(translated_text)
-                        gloss_text = isl_gloss_spacy(processed_text)
-                        
-                        # Update UI with "Chat" bubbles
-                        transcript_container.markdown(f"""
-                        <div class="chat-bubble user-bubble">
-                            <div style="font-size: 0.8rem; color: #A5B4FC; margin-bottom: 4px;">You said ({selected_lang})</div>
-                            <div style="font-size: 1.1rem;">"{recognized_text}"</div>
-                        </div>
-                        <div class="chat-bubble bot-bubble">
-                            <div style="font-size: 0.8rem; color: #6EE7B7; margin-bottom: 4px;">Translation & ISL Gloss</div>
-                            <div style="font-size: 1rem; margin-bottom: 8px;">{translated_text}</div>
-                            <div class="gloss-box">GLOSS: {gloss_text.upper()}</div>
-                        </div>
-                        """, unsafe_allow_html=True)
+                            # Update UI with "Chat" bubbles
+                            transcript_container.markdown(f"""
+                            <div class="chat-bubble user-bubble">
+                                <div style="font-size: 0.8rem; color: #A5B4FC; margin-bottom: 4px;">You said ({selected_lang})</div>
+                                <div style="font-size: 1.1rem;">"{recognized_text}"</div>
+                            </div>
+                            <div class="chat-bubble bot-bubble">
+                                <div style="font-size: 0.8rem; color: #6EE7B7; margin-bottom: 4px;">Translation & ISL Gloss</div>
+                                <div style="font-size: 1rem; margin-bottom: 8px;">{translated_text}</div>
+                                <div class="gloss-box">GLOSS: {gloss_text.upper()}</div>
+                                <div style="font-size: 0.8rem; color: #9CA3AF; margin-top: 6px;">{len(info.clips)} signs · {info.duration:.1f}s</div>
+                            </div>
+                            """, unsafe_allow_html=True)
                         
-                        # Play Video
-                        video_seq = get_video_sequence(gloss_text)
-                        play_video_sequence(video_seq, video_placeholder)
+                            # Play Video
+                            video_seq = phrase.sequence
+                            shown = play_sentence(
+                                video_seq, video_placeholder,
+                                lambda: metrics.first_frame(phrase.captured_at, phrase.finished_at),
+                                session_id=session_id)
+                            resources.charge(session_id, phrases=1)
+                            render_metrics(metrics_placeholder, session_id)
+                            # Streamlit servers are rarely stopped cleanly; save the memo as we go
+                            warm.maybe_save()
+                            if shown:
+                                # The browser plays the stitched clip; let it finish before the
+                                # next phrase replaces it (later phrases wait in the pipeline)
+                                time.sleep(info.duration)
+                                continue
                         
-                        # Reset Video Placeholder after playing
-                        video_placeholder.markdown(
-                            """
-                            <div style="background: #1F2937; height: 300px; border-radius: 12px; display: flex; align-items: center; justify-content: center; color: #6B7280; border: 2px dashed #374151;">
-                                Ready for next phrase...
-                            </div>
-                            """, unsafe_allow_html=True
-                        )
+                            # Reset Video Placeholder after playing
+                            video_placeholder.markdown(
+                                """
+                                <div style="background: #1F2937; height: 300px; border-radius: 12px; display: flex; align-items: center; justify-content: center; color: #6B7280; border: 2px dashed #374151;">
+                                    Ready for next phrase...
+                                </div>
+                                """, unsafe_allow_html=True
+                            )
                         
-                    except sr.WaitTimeoutError:
-                        continue 
-                    except sr.UnknownValueError:
-                        # Optional: Show visual feedback for "Listening..." silence, or ignore
-                        pass
-                    except sr.RequestError as e:
-                        st.error(f"API Error: {e}")
-                        st.session_state.listening = False
-                        st.rerun()
-                        break
+                        except sr.UnknownValueError:
+                            # Optional: Show visual feedback for "Listening..." silence, or ignore
+                            pass
+                        except sr.RequestError as e:
+                            st.error(f"API Error: {e}")
+                            st.session_state.listening = False
+                            st.rerun()
+                            break
                     
-                    # Check if button was clicked using session state (not robust in loop, but loop is short)
-                    # Ideally, we break loop to check state, but that stops listening.
-                    # We rely on Streamlit's "Stop" button triggering a hard rerun.
-                    pass
+                        # Check if button was clicked using session state (not robust in loop, but loop is short)
+                        # Ideally, we break loop to check state, but that stops listening.
+                        # We rely on Streamlit's "Stop" button triggering a hard rerun.
+                        pass
+                finally:
+                    pipeline.stop()
 
         except Exception as e:
             st.error(f"Microphone Error: {e}")
             st.session_state.listening = False 
 
 if __name__ == "__main__":
+    # Streamlit re-executes the script on every rerun, so this is reported per run
+    report_startup("streamlit_app.py", _startup)
     main()
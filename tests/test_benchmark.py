@@ -0,0 +1,25 @@
+from benchmark import NOISY_TOLERANCE, compare, result
+
+
+def baseline(**results):
+    return {"results": results}
+
+
+def test_compare_flags_slowdown_beyond_tolerance():
+    base = baseline(**{"decode.read_us_per_frame": result(100.0, "us/frame", False)})
+    assert compare({"decode.read_us_per_frame": result(115.0, "us/frame", False)}, base) == []
+    [(name, before, after, change)] = compare({"decode.read_us_per_frame": result(130.0, "us/frame", False)}, base)
+    assert name == "decode.read_us_per_frame" and round(change, 2) == 0.30
+
+
+def test_compare_uses_wider_tolerance_for_noisy_results():
+    base = baseline(**{"lookup.sentence_us": result(3.0, "us/call", False, tolerance=NOISY_TOLERANCE)})
+    assert compare({"lookup.sentence_us": result(5.5, "us/call", False)}, base) == []
+    assert compare({"lookup.sentence_us": result(6.5, "us/call", False)}, base)
+
+
+def test_compare_reports_results_missing_from_a_run():
+    base = baseline(**{"gloss.p50_ms": result(2.0, "ms", False), "lookup.cached_us": result(2.0, "us/call", False)})
+    assert compare({"lookup.cached_us": result(2.0, "us/call", False)}, base) == [("gloss.p50_ms", 2.0, None, None)]
+    # Suites that were not asked for are not missing
+    assert compare({"lookup.cached_us": result(2.0, "us/call", False)}, base, suites=["lookup"]) == []
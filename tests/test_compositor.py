@@ -0,0 +1,37 @@
+import threading
+
+from compositor import SentenceCompositor
+from frame_cache import DEFAULT_TIER
+
+
+class _NoClips:
+    # Frame cache stand-in where no clip decodes, so every job finishes at once
+    tier = DEFAULT_TIER
+
+    def get(self, video_path):
+        return None
+
+
+def test_compose_job_that_finishes_immediately_does_not_hang(tmp_path):
+    compositor = SentenceCompositor(cache_dir=str(tmp_path), frame_cache=_NoClips())
+    results = []
+
+    def run():
+        for i in range(500):
+            results.append(compositor.compose([f"x{i}.mp4"]).result())
+
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    worker.join(timeout=20)
+    assert not worker.is_alive(), "compose() deadlocked"
+    assert results == [None] * 500
+    assert not compositor._pending
+
+
+def test_key_changes_when_a_clip_is_replaced(tmp_path):
+    clip = tmp_path / "Hello.mp4"
+    clip.write_bytes(b"one")
+    compositor = SentenceCompositor(cache_dir=str(tmp_path / "sentences"), frame_cache=_NoClips())
+    before = compositor.key([str(clip)])
+    clip.write_bytes(b"three")
+    assert compositor.key([str(clip)]) != before
@@ -0,0 +1,45 @@
+import os
+import shutil
+
+import frame_store
+from frame_cache import display_tier
+from frame_store import FrameStore, build_store
+from video_index import get_index
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIER = display_tier(64, 36)
+
+
+def small_store(tmp_path):
+    base_dir = tmp_path / "datasets"
+    (base_dir / "letters").mkdir(parents=True)
+    for name in ("A.mp4", "B.mp4"):
+        shutil.copy(os.path.join(ROOT, "datasets", "letters", name), base_dir / "letters" / name)
+    base_dir = str(base_dir)
+    return FrameStore(build_store(base_dir, tier=TIER, log=lambda message: None), base_dir), base_dir
+
+
+def test_sources_are_checked_once_per_index_generation(tmp_path, monkeypatch):
+    store, base_dir = small_store(tmp_path)
+    path = os.path.join(base_dir, "letters", "A.mp4")
+    stats = []
+    signature = frame_store.file_signature
+    monkeypatch.setattr(frame_store, "file_signature", lambda p: stats.append(p) or signature(p))
+
+    for _ in range(10):
+        assert store.get(path) is not None and path in store
+    assert len(stats) == 2
+
+
+def test_replaced_clip_is_not_served_after_a_rescan(tmp_path):
+    store, base_dir = small_store(tmp_path)
+    path = os.path.join(base_dir, "letters", "A.mp4")
+    assert store.get(path) is not None
+
+    replacement = os.path.join(base_dir, "replacement.tmp")
+    shutil.copy(os.path.join(ROOT, "datasets", "letters", "C.mp4"), replacement)
+    os.replace(replacement, path)
+    get_index(base_dir).refresh()
+
+    assert store.get(path) is None
+    assert store.get(os.path.join(base_dir, "letters", "B.mp4")) is not None
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from gloss_lexicon import DEFAULT_CORPUS, HELDOUT_CORPUS, GlossLexicon, build_lexicon, read_corpus
+from isl_gloss import gloss_doc, preprocess
+from nlp_loader import get_nlp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUILD_CORPUS = os.path.join(ROOT, DEFAULT_CORPUS)
+HELDOUT = os.path.join(ROOT, HELDOUT_CORPUS)
+
+
+@pytest.fixture(scope="module")
+def nlp():
+    try:
+        return get_nlp()
+    except OSError as e:
+        pytest.skip(str(e))
+
+
+@pytest.fixture(scope="module")
+def lexicon(nlp, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("lexicon") / "gloss_lexicon.json")
+    build_lexicon(os.path.join(ROOT, "datasets"), [BUILD_CORPUS], path, log=lambda message: None)
+    return GlossLexicon.load(path)
+
+
+def test_heldout_corpus_is_not_in_build_corpus():
+    learned = {preprocess(text) for text in read_corpus([BUILD_CORPUS])}
+    heldout = [preprocess(text) for text in read_corpus([HELDOUT])]
+    assert heldout
+    assert not learned.intersection(heldout)
+
+
+def test_lexicon_matches_spacy_on_unseen_sentences(nlp, lexicon):
+    sentences = [preprocess(text) for text in read_corpus([HELDOUT])]
+    covered = 0
+    for text, doc in zip(sentences, nlp.pipe(sentences)):
+        fast = lexicon.gloss(text)
+        if fast is None:
+            continue
+        covered += 1
+        assert fast == gloss_doc(doc), text
+    # The check means nothing if the lexicon declines every sentence
+    assert covered, "the lexicon served none of the held-out sentences"
+
+
+def test_lexicon_declines_unknown_words():
+    lexicon = GlossLexicon({"i": [None, None], "go": ["go", None]})
+    assert lexicon.gloss("i go") == "go"
+    assert lexicon.gloss("i go home") is None
+    assert lexicon.gloss("i  go") is None
@@ -0,0 +1,39 @@
+import os
+import shutil
+
+import numpy as np
+
+from frame_cache import display_tier
+from frame_store import FrameStore, build_store
+from letter_atlas import LetterAtlas
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIER = display_tier(64, 36)
+
+
+def small_dataset(tmp_path):
+    base_dir = tmp_path / "datasets"
+    for folder, names in (("letters", ["A.mp4", "B.mp4"]), ("full_word_videos", ["Hello.mp4"])):
+        (base_dir / folder).mkdir(parents=True)
+        for name in names:
+            shutil.copy(os.path.join(ROOT, "datasets", folder, name), base_dir / folder / name)
+    return str(base_dir)
+
+
+def test_atlas_maps_letters_from_the_frame_store(tmp_path):
+    base_dir = small_dataset(tmp_path)
+    store = FrameStore(build_store(base_dir, tier=TIER, log=lambda message: None), base_dir)
+    atlas = LetterAtlas(base_dir, TIER, store=store, log=lambda message: None)._current()
+
+    assert atlas.nbytes == 0
+    assert np.shares_memory(atlas.frames, store._data)
+    path = os.path.join(base_dir, "letters", "B.mp4")
+    assert np.array_equal(atlas.get(path).frames, store.get(path).frames)
+
+
+def test_atlas_copies_letters_without_a_store(tmp_path):
+    base_dir = small_dataset(tmp_path)
+    atlas = LetterAtlas(base_dir, TIER, log=lambda message: None)._current()
+
+    assert atlas.nbytes == atlas.frames.nbytes > 0
+    assert sorted(atlas.ranges) == ["a", "b"]
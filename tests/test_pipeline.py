@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from metrics import Metrics
+from pipeline import ScriptedSource, SpeechPipeline
+
+
+def collect(pipeline, count, timeout=5.0):
+    phrases = []
+    deadline = time.monotonic() + timeout
+    while len(phrases) < count and time.monotonic() < deadline:
+        phrase = pipeline.get(timeout=0.1)
+        if phrase is not None:
+            phrases.append(phrase)
+    return phrases
+
+
+def test_scripted_phrases_come_out_glossed_in_order():
+    pytest.importorskip("speech_recognition")
+    from recognizers import StubRecognizer
+    from translation import DictionaryTranslator
+
+    source = ScriptedSource(["namaste", "thank you"])
+    pipeline = SpeechPipeline(
+        listen=source.listen,
+        recognize=StubRecognizer().recognize,
+        translate=DictionaryTranslator({"namaste": "hello"}).translate,
+        gloss=str.upper,
+        sequence=str.split,
+        metrics=Metrics(),
+    ).start()
+    try:
+        phrases = collect(pipeline, 2)
+    finally:
+        pipeline.stop()
+    assert [(p.error, p.translated, p.gloss, p.sequence) for p in phrases] == [
+        (None, "hello", "HELLO", ["HELLO"]),
+        (None, "thank you", "THANK YOU", ["THANK", "YOU"]),
+    ]
+
+
+def test_persistent_listen_failure_backs_off_and_stops():
+    calls = []
+
+    def listen():
+        calls.append(time.monotonic())
+        raise OSError("no microphone")
+
+    pipeline = SpeechPipeline(listen=listen, recognize=str, translate=str, gloss=str, metrics=Metrics(),
+                              max_listen_failures=3).start()
+    try:
+        phrases = collect(pipeline, 3, timeout=3.0)
+    finally:
+        pipeline.stop()
+    # The first failure and the one that stopped capture; nothing in between
+    assert [p.error_stage for p in phrases] == ["listen", "listen"]
+    assert isinstance(phrases[0].error, OSError)
+    assert pipeline.listen_error is phrases[1].error
+    assert len(calls) == 3
+    assert calls[2] - calls[1] > calls[1] - calls[0] >= 0.5
@@ -0,0 +1,36 @@
+import gc
+import os
+
+import numpy as np
+import pytest
+
+from frame_cache import decode_clip, display_tier
+from process_pool import _USE_SHARED_MEMORY, ProcessPool
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LETTER = os.path.join(ROOT, "datasets", "letters", "A.mp4")
+TIER = display_tier(64, 36)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = ProcessPool(1)
+    yield pool
+    pool.shutdown()
+
+
+def test_decoded_frames_come_back_intact(pool):
+    clip = pool.decode(LETTER, TIER)
+    expected = decode_clip(LETTER, TIER)
+    assert clip.fps == expected.fps
+    assert np.array_equal(clip.frames, expected.frames)
+
+
+@pytest.mark.skipif(not _USE_SHARED_MEMORY, reason="frames are pickled on this platform")
+def test_views_outlive_the_clip(pool):
+    clip = pool.decode(LETTER, TIER)
+    view = clip.frames[1:3]
+    expected = clip.frames[1:3].copy()
+    del clip
+    gc.collect()
+    assert np.array_equal(view, expected)
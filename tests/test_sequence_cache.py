@@ -0,0 +1,35 @@
+import os
+
+import numpy as np
+
+from frame_cache import Clip
+from sequence_cache import SequenceCache, mp4_info
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_DIR = os.path.join(ROOT, "datasets")
+LETTER = os.path.join(BASE_DIR, "letters", "A.mp4")
+
+
+class TrimmedAtlas:
+    # Plays every letter as a 3 frame clip
+    built = True
+    trim = True
+
+    def __contains__(self, video_path):
+        return os.path.basename(os.path.dirname(video_path)) == "letters"
+
+    def get(self, video_path):
+        return Clip(np.zeros((3, 2, 2, 3), np.uint8), 30.0)
+
+
+def test_clip_lengths_come_from_the_mp4_header_without_an_atlas():
+    cache = SequenceCache()
+    assert cache.clip_info(LETTER) == mp4_info(LETTER)
+
+
+def test_attached_atlas_supplies_letter_lengths():
+    cache = SequenceCache()
+    cache.get("a", BASE_DIR)
+    cache.attach(TrimmedAtlas())
+    assert cache.clip_info(LETTER) == (3, 30.0)
+    assert cache.get("a", BASE_DIR).frames == 3
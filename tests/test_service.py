@@ -0,0 +1,26 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from aiohttp.test_utils import TestClient, TestServer  # noqa: E402
+
+from service import SignService, create_app  # noqa: E402
+from translation import DictionaryTranslator  # noqa: E402
+
+
+def post(path, body):
+    async def run():
+        service = SignService(translator=DictionaryTranslator({}))
+        async with TestClient(TestServer(create_app(service))) as client:
+            response = await client.post(path, data=body, headers={"Content-Type": "application/json"})
+            return response.status, await response.text()
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("path", ["/v1/sign", "/v1/gloss"])
+@pytest.mark.parametrize("body", [b"{not json", b"\xff\xfe{\"text\": 1}", b"[1, 2]"])
+def test_malformed_bodies_are_bad_requests(path, body):
+    status, _ = post(path, body)
+    assert status == 400
@@ -0,0 +1,48 @@
+import wave
+
+import numpy as np
+import pytest
+
+pytest.importorskip("speech_recognition")
+
+from vad import END_SILENCE, FRAME_MS, Segmenter, read_wav, segments_from_wav  # noqa: E402
+
+RATE = 16000
+
+
+def write_wav(path, parts):
+    # parts: (seconds, speech?) in order; speech is a 220 Hz tone over faint noise
+    rng = np.random.default_rng(0)
+    chunks = []
+    for seconds, speech in parts:
+        t = np.arange(int(seconds * RATE)) / RATE
+        chunk = rng.normal(0, 0.001, len(t))
+        if speech:
+            chunk += 0.3 * np.sin(2 * np.pi * 220 * t)
+        chunks.append(chunk)
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes((np.concatenate(chunks) * 32767).astype("<i2").tobytes())
+    return str(path)
+
+
+def test_pauses_longer_than_end_silence_split_segments(tmp_path):
+    # The 0.3s pause is kept inside the first phrase, the 1.0s one ends it
+    path = write_wav(tmp_path / "two.wav", [(0.5, False), (0.6, True), (0.3, False), (0.6, True),
+                                            (1.0, False), (0.8, True), (1.0, False)])
+    assert len(list(segments_from_wav(path))) == 2
+
+
+def test_segment_ends_end_silence_after_the_speech(tmp_path):
+    path = write_wav(tmp_path / "one.wav", [(0.5, False), (1.0, True), (1.5, False)])
+    data, rate = read_wav(path)
+    segmenter = Segmenter(rate, 2)
+    ends = []
+    for start in range(0, len(data), segmenter.frame_bytes):
+        if segmenter.feed(data[start:start + segmenter.frame_bytes]):
+            ends.append((start + segmenter.frame_bytes) / 2 / rate)
+    assert segmenter.flush() is None
+    assert len(ends) == 1
+    assert abs(ends[0] - (1.5 + END_SILENCE)) <= 2 * FRAME_MS / 1000
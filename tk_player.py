@@ -0,0 +1,223 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from PIL import Image, ImageTk
+
+from playback_clock import PlaybackClock
+from prefetch import ClipPrefetcher
+
+# What happens to a new sequence while one is playing: "queue" plays it
+# afterwards, "preempt" cuts the current one off
+DEFAULT_POLICY = os.environ.get("ISL_TK_POLICY", "queue").lower()
+# Sequences allowed to wait in "queue" mode; the oldest waiting one is dropped
+MAX_PENDING = int(os.environ.get("ISL_TK_MAX_PENDING", "2"))
+# Decoded frames buffered ahead of the screen
+BUFFER_FRAMES = int(os.environ.get("ISL_TK_BUFFER", "48"))
+IDLE_TICK_MS = 15
+
+
+class _Job:
+    def __init__(self, seq, clips, on_first_frame):
+        self.seq = seq
+        self.clips = clips
+        self.on_first_frame = on_first_frame
+
+
+class TkPlayer:
+    # Plays sign sequences into a Tk label. A decoder thread turns clips into
+    # PIL images in a bounded buffer; the Tk main thread only pops them and
+    # blits on `after` ticks, paced by a PlaybackClock. play()/play_stream()
+    # may be called from any thread, everything touching Tk runs in _tick.
+    def __init__(self, widget, loader=None, policy=DEFAULT_POLICY, max_pending=MAX_PENDING,
+                 buffer_frames=BUFFER_FRAMES, clip_gap=0.2, log=print):
+        if policy not in ("queue", "preempt"):
+            raise ValueError(f"Unknown playback policy {policy!r}; choose queue or preempt")
+        self.widget = widget
+        self.loader = loader
+        self.policy = policy
+        self.max_pending = max_pending
+        self.clip_gap = clip_gap
+        self.log = log
+        self.dropped_sequences = 0
+        self._frames = queue.Queue(maxsize=max(1, buffer_frames))
+        self._jobs = deque()
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._cancelled = 0  # sequences numbered <= this are abandoned
+        self._decoding = None
+        self._stopped = False
+        # Main-thread state
+        self._playing = None
+        self._clock = None
+        self._scheduled = None
+        self._photo = None
+        self._after_id = None
+        self._thread = threading.Thread(target=self._decode_loop, name="tk-player-decode", daemon=True)
+
+    # --- Any thread ---
+    def start(self):
+        # Call on the Tk main thread once the widget exists
+        self._thread.start()
+        self._after_id = self.widget.after(IDLE_TICK_MS, self._tick)
+        return self
+
+    def play(self, video_paths, on_first_frame=None):
+        return self._submit(ClipPrefetcher(video_paths, loader=self.loader), on_first_frame)
+
+    def play_stream(self, clips, on_first_frame=None):
+        # clips: an open-ended ClipPrefetcher that keeps receiving clips
+        return self._submit(clips, on_first_frame)
+
+    def _submit(self, clips, on_first_frame):
+        with self._cond:
+            self._seq += 1
+            job = _Job(self._seq, clips, on_first_frame)
+            if self.policy == "preempt":
+                self._cancel_before(job.seq)
+            else:
+                while len(self._jobs) >= self.max_pending:
+                    self._jobs.popleft().clips.close()
+                    self.dropped_sequences += 1
+            self._jobs.append(job)
+            self._cond.notify()
+        return job.seq
+
+    def _cancel_before(self, seq):
+        self._cancelled = seq - 1
+        while self._jobs:
+            self._jobs.popleft().clips.close()
+            self.dropped_sequences += 1
+        if self._decoding is not None:
+            self._decoding.clips.close()
+            self.dropped_sequences += 1
+
+    @property
+    def busy(self):
+        return bool(self._jobs) or self._decoding is not None or self._playing is not None
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cancel_before(self._seq + 1)
+            self._cond.notify()
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    # --- Decoder thread ---
+    def _stale(self, seq):
+        return self._stopped or seq <= self._cancelled
+
+    def _put(self, item):
+        # Blocks while the buffer is full; gives up if the sequence is dropped
+        while not self._stale(item[1]):
+            try:
+                self._frames.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _decode_loop(self):
+        while True:
+            with self._cond:
+                while not self._jobs and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                job = self._decoding = self._jobs.popleft()
+            try:
+                self._decode(job)
+            finally:
+                job.clips.close()
+                with self._cond:
+                    self._decoding = None
+
+    def _decode(self, job):
+        seq = job.seq
+        if not self._put(("start", seq, job.on_first_frame)):
+            return
+        while not self._stale(seq):
+            try:
+                item = job.clips.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+            path, clip = item
+            if clip is None:
+                self.log(f"Error: Could not open {path}")
+                continue
+            if not self._put(("clip", seq, len(clip.frames), clip.fps)):
+                return
+            for index, frame in enumerate(clip.frames):
+                if not self._put(("frame", seq, index, Image.fromarray(frame))):
+                    return
+        self._put(("end", seq))
+
+    # --- Tk main thread ---
+    def _tick(self):
+        delay = IDLE_TICK_MS
+        try:
+            delay = self._step()
+        finally:
+            if not self._stopped:
+                self._after_id = self.widget.after(delay, self._tick)
+
+    def _step(self):
+        # Returns milliseconds until the next tick
+        if self._playing is not None and self._playing.seq <= self._cancelled:
+            self._playing = None
+        while True:
+            if self._scheduled is not None:
+                image, due = self._scheduled
+                if self._playing is None or self._playing.seq <= self._cancelled:
+                    self._scheduled = None
+                    continue
+                wait = due - time.monotonic()
+                if wait > 0.001:
+                    return max(1, int(wait * 1000))
+                self._scheduled = None
+                self._blit(image)
+                continue
+            try:
+                item = self._frames.get_nowait()
+            except queue.Empty:
+                return IDLE_TICK_MS
+            kind, seq = item[0], item[1]
+            if seq <= self._cancelled:
+                if self._playing is not None and self._playing.seq == seq:
+                    self._playing = None
+                continue
+            if kind == "start":
+                self._playing = _Job(seq, None, item[2])
+                self._clock = PlaybackClock(clip_gap=self.clip_gap)
+            elif kind == "clip":
+                self._clock.start_clip(item[2], item[3])
+            elif kind == "frame":
+                step = self._clock.next_frame()
+                if step is None or item[2] < step[0]:
+                    continue  # the clock skipped this frame to catch up
+                self._scheduled = (item[3], time.monotonic() + step[1])
+            elif kind == "end":
+                self.log(f"Video sequence finished ({self._clock.report()}).")
+                self._playing = None
+
+    def _blit(self, image):
+        if self._photo is not None and self._photo.width() == image.width and self._photo.height() == image.height:
+            self._photo.paste(image)
+        else:
+            self._photo = ImageTk.PhotoImage(image=image)
+            self.widget.config(image=self._photo)
+            self.widget.imgtk = self._photo
+        self._clock.frame_shown()
+        on_first_frame = self._playing.on_first_frame
+        if on_first_frame is not None:
+            self._playing.on_first_frame = None
+            on_first_frame()
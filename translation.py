@@ -0,0 +1,135 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.environ.get("ISL_TRANSLATION_CACHE", os.path.join(".cache", "translations.sqlite3"))
+# Backend selection: google (default) or dictionary (offline)
+DEFAULT_BACKEND = os.environ.get("ISL_TRANSLATOR", "google")
+
+
+def source_language(lang_code):
+    # "ta-IN" -> "ta"
+    return lang_code.split('-')[0].lower()
+
+
+class GoogleBackend:
+    name = "google"
+
+    def __init__(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def client(self, source):
+        # One GoogleTranslator per source language, reused across phrases
+        with self._lock:
+            if source not in self._clients:
+                from deep_translator import GoogleTranslator
+                self._clients[source] = GoogleTranslator(source=source, target='en')
+            return self._clients[source]
+
+    def translate(self, text, source):
+        return self.client(source).translate(text)
+
+
+class DictionaryTranslator:
+    # Offline stand-in. The dictionary is either {text: english} or
+    # {source language: {text: english}}; unknown text is returned unchanged.
+    name = "dictionary"
+
+    def __init__(self, dictionary=None, path=None, delay=0.0):
+        if dictionary is None:
+            path = path or os.environ.get("ISL_TRANSLATION_DICT")
+            dictionary = {}
+            if path:
+                with open(path, encoding="utf-8") as f:
+                    dictionary = json.load(f)
+        self.dictionary = dictionary
+        self.delay = delay
+
+    def translate(self, text, source="auto"):
+        time.sleep(self.delay)
+        table = self.dictionary.get(source)
+        if isinstance(table, dict):
+            return table.get(text, text)
+        translated = self.dictionary.get(text)
+        return translated if isinstance(translated, str) else text
+
+
+class TranslationCache:
+    # Persistent (source language, text) -> translation store in sqlite
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "source TEXT NOT NULL, text TEXT NOT NULL, translated TEXT NOT NULL, "
+            "PRIMARY KEY (source, text))")
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, source, text):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT translated FROM translations WHERE source = ? AND text = ?", (source, text)).fetchone()
+        return row[0] if row else None
+
+    def put(self, source, text, translated):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations (source, text, translated) VALUES (?, ?, ?)",
+                (source, text, translated))
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class Translator:
+    # Translation to English in front of a backend: English input is passed
+    # through, everything else goes through the persistent cache first.
+    def __init__(self, backend=None, cache=None):
+        self.backend = backend or get_backend()
+        self.cache = cache if cache is not None else TranslationCache()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+    def translate(self, text, lang_code="en-IN"):
+        source = source_language(lang_code)
+        if source == "en" or not text.strip():
+            self.skipped += 1
+            return text
+        translated = self.cache.get(source, text)
+        if translated is not None:
+            self.hits += 1
+            return translated
+        self.misses += 1
+        translated = self.backend.translate(text, source)
+        if translated:
+            self.cache.put(source, text, translated)
+        return translated
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "skipped": self.skipped, "cached": len(self.cache)}
+
+
+BACKENDS = {
+    "google": GoogleBackend,
+    "dictionary": DictionaryTranslator,
+}
+
+
+def get_backend(name=None):
+    name = (name or DEFAULT_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown translator backend {name!r}; choose from {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
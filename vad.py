@@ -0,0 +1,209 @@
+import argparse
+import os
+import time
+import wave
+from collections import deque
+
+import numpy as np
+import speech_recognition as sr
+
+from metrics import metrics
+from pipeline import SourceIdle
+
+# Speech must rise this many times above the noise floor (RMS)
+ENERGY_RATIO = float(os.environ.get("ISL_VAD_ENERGY_RATIO", "3.0"))
+# A pause this long ends the phrase
+END_SILENCE = float(os.environ.get("ISL_VAD_END_SILENCE", "0.6"))
+# Safety cap for speech without any pause
+MAX_PHRASE = float(os.environ.get("ISL_VAD_MAX_PHRASE", "15.0"))
+FRAME_MS = 30
+
+
+class VoiceActivityDetector:
+    # Frame-level energy / zero-crossing detector. The noise floor follows the
+    # quiet frames continuously (fast when it drops, slowly when it rises),
+    # so there is no one-off ambient calibration to go stale. Very noisy
+    # frames with a hiss-like zero-crossing rate need twice the energy.
+    def __init__(self, energy_ratio=ENERGY_RATIO, min_rms=0.002, zcr_max=0.35,
+                 floor_attack=0.3, floor_release=0.02):
+        self.energy_ratio = energy_ratio
+        self.min_rms = min_rms
+        self.zcr_max = zcr_max
+        self.floor_attack = floor_attack
+        self.floor_release = floor_release
+        self.noise_floor = None
+
+    def is_speech(self, samples):
+        # samples: float32 array in [-1, 1] for one frame
+        rms = float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+        if self.noise_floor is None:
+            self.noise_floor = max(rms, self.min_rms / self.energy_ratio)
+            return False
+        signs = np.signbit(samples)
+        zcr = float(np.count_nonzero(signs[1:] != signs[:-1])) / max(1, len(samples) - 1)
+        threshold = max(self.noise_floor * self.energy_ratio, self.min_rms)
+        speech = rms > threshold and (zcr < self.zcr_max or rms > 2 * threshold)
+        if not speech:
+            rate = self.floor_attack if rms < self.noise_floor else self.floor_release
+            self.noise_floor += rate * (rms - self.noise_floor)
+        return speech
+
+
+class Segmenter:
+    # Groups VAD decisions into utterances. Speech starts after `start_ms` of
+    # voiced frames (the frames just before it are kept as pre-roll) and ends
+    # after `end_silence` seconds of silence or at `max_phrase`. Segments
+    # shorter than `min_speech` seconds (clicks, coughs) are dropped.
+    def __init__(self, sample_rate=16000, sample_width=2, vad=None, frame_ms=FRAME_MS,
+                 start_ms=90, end_silence=END_SILENCE, min_speech=0.25, max_phrase=MAX_PHRASE, pre_roll=0.3):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.vad = vad or VoiceActivityDetector()
+        self.frame_bytes = int(sample_rate * frame_ms / 1000) * sample_width
+        self.frame_seconds = frame_ms / 1000.0
+        self.start_frames = max(1, int(start_ms / frame_ms))
+        self.end_frames = max(1, int(end_silence * 1000 / frame_ms))
+        self.min_frames = int(min_speech * 1000 / frame_ms)
+        self.max_frames = int(max_phrase * 1000 / frame_ms)
+        self._pre_roll = deque(maxlen=self.start_frames + int(pre_roll * 1000 / frame_ms))
+        self._pending = b""
+        self._voiced_run = 0
+        self._segment = None
+        self._silent_run = 0
+        self._speech_frames = 0
+
+    @property
+    def in_speech(self):
+        return self._segment is not None
+
+    def _samples(self, frame):
+        if self.sample_width == 2:
+            return np.frombuffer(frame, dtype="<i2").astype(np.float32) / 32768.0
+        return (np.frombuffer(frame, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+
+    def feed(self, data):
+        # Raw PCM bytes in; returns the list of finished segments (bytes)
+        self._pending += data
+        finished = []
+        while len(self._pending) >= self.frame_bytes:
+            frame, self._pending = self._pending[:self.frame_bytes], self._pending[self.frame_bytes:]
+            segment = self._push(frame, self.vad.is_speech(self._samples(frame)))
+            if segment is not None:
+                finished.append(segment)
+        return finished
+
+    def _push(self, frame, speech):
+        if self._segment is None:
+            self._pre_roll.append(frame)
+            self._voiced_run = self._voiced_run + 1 if speech else 0
+            if self._voiced_run >= self.start_frames:
+                self._segment = list(self._pre_roll)
+                self._pre_roll.clear()
+                self._speech_frames = self._voiced_run
+                self._silent_run = 0
+            return None
+        self._segment.append(frame)
+        if speech:
+            self._speech_frames += 1
+            self._silent_run = 0
+        else:
+            self._silent_run += 1
+        if self._silent_run >= self.end_frames or len(self._segment) >= self.max_frames:
+            return self._close()
+        return None
+
+    def _close(self):
+        segment, speech_frames = self._segment, self._speech_frames
+        self._segment = None
+        self._voiced_run = 0
+        self._silent_run = 0
+        self._speech_frames = 0
+        if speech_frames < self.min_frames:
+            metrics.incr("vad_dropped")
+            return None
+        metrics.incr("vad_segments")
+        return b"".join(segment)
+
+    def flush(self):
+        # End of input: returns the open segment, if any
+        if self._segment is None:
+            return None
+        return self._close()
+
+    def audio(self, segment):
+        return sr.AudioData(segment, self.sample_rate, self.sample_width)
+
+
+class VADListener:
+    # Drop-in replacement for recognizer.listen(source, ...): reads the raw
+    # PyAudio stream of an open sr.Microphone and returns each voiced segment
+    # as sr.AudioData. Raises SourceIdle after idle_timeout seconds without
+    # speech so callers can check their stop flag.
+    def __init__(self, source, idle_timeout=1.0, segmenter=None):
+        self.source = source
+        self.idle_timeout = idle_timeout
+        self.segmenter = segmenter or Segmenter(source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+        self._ready = deque()
+
+    def listen(self):
+        deadline = time.monotonic() + self.idle_timeout
+        while not self._ready:
+            chunk = self.source.stream.read(self.source.CHUNK)
+            self._ready.extend(self.segmenter.feed(chunk))
+            if self.segmenter.in_speech:
+                deadline = time.monotonic() + self.idle_timeout
+            elif not self._ready and time.monotonic() > deadline:
+                raise SourceIdle()
+        return self.segmenter.audio(self._ready.popleft())
+
+
+def read_wav(path):
+    # (mono PCM16 bytes, sample rate) from a WAV file
+    with wave.open(path, "rb") as wav:
+        rate, width, channels = wav.getframerate(), wav.getsampwidth(), wav.getnchannels()
+        data = wav.readframes(wav.getnframes())
+    if width == 1:
+        data = ((np.frombuffer(data, dtype=np.uint8).astype(np.int16) - 128) << 8).astype("<i2").tobytes()
+    elif width == 4:
+        data = (np.frombuffer(data, dtype="<i4") >> 16).astype("<i2").tobytes()
+    elif width != 2:
+        raise ValueError(f"{path}: unsupported sample width {width}")
+    if channels > 1:
+        samples = np.frombuffer(data, dtype="<i2").reshape(-1, channels)
+        data = samples.mean(axis=1).astype("<i2").tobytes()
+    return data, rate
+
+
+def segments_from_wav(path, segmenter=None, chunk=1024):
+    # Yields the voiced segments of a WAV file as sr.AudioData, exactly as the
+    # microphone front end would (fixtures need no microphone)
+    data, rate = read_wav(path)
+    segmenter = segmenter or Segmenter(rate, 2)
+    for start in range(0, len(data), chunk * 2):
+        for segment in segmenter.feed(data[start:start + chunk * 2]):
+            yield segmenter.audio(segment)
+    segment = segmenter.flush()
+    if segment is not None:
+        yield segmenter.audio(segment)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m vad", description="Print the voiced segments of WAV files.")
+    parser.add_argument("wavs", nargs="+")
+    parser.add_argument("--end-silence", type=float, default=END_SILENCE)
+    parser.add_argument("--energy-ratio", type=float, default=ENERGY_RATIO)
+    args = parser.parse_args(argv)
+    for path in args.wavs:
+        data, rate = read_wav(path)
+        segmenter = Segmenter(rate, 2, VoiceActivityDetector(args.energy_ratio), end_silence=args.end_silence)
+        voiced = 0.0
+        print(f"🎧 {path} ({len(data) / 2 / rate:.2f}s)")
+        for audio in segments_from_wav(path, segmenter):
+            seconds = len(audio.frame_data) / 2 / rate
+            print(f"  🗣 segment {seconds:.2f}s")
+            voiced += seconds
+        print(f"  {voiced:.2f}s voiced")
+
+
+if __name__ == "__main__":
+    main()
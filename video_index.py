@@ -0,0 +1,181 @@
+import os
+import threading
+import time
+
+VIDEO_EXT = ".mp4"
+WORD_DIR = "full_word_videos"
+LETTER_DIR = "letters"
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+
+def dataset_mtimes(base_dir='datasets'):
+    # Modification times of the clip folders; any add/remove/rename changes them
+    mtimes = {}
+    for sub in (WORD_DIR, LETTER_DIR):
+        try:
+            mtimes[sub] = os.stat(os.path.join(base_dir, sub)).st_mtime_ns
+        except FileNotFoundError:
+            mtimes[sub] = None
+    return mtimes
+
+
+def file_signature(path):
+    # [mtime_ns, size] of one clip; changes when the file is replaced in place
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+class _DirtyHandler(FileSystemEventHandler):
+    def __init__(self, index):
+        self.index = index
+
+    def on_any_event(self, event):
+        self.index.mark_dirty()
+
+
+class VideoIndex:
+    # Case-normalized lookup of the sign clips under base_dir, so a gloss word
+    # resolves to "Hello.mp4" on case-sensitive filesystems without a stat per word.
+    def __init__(self, base_dir='datasets', check_interval=2.0, seed=None):
+        self.base_dir = base_dir
+        self.word_dir = os.path.join(base_dir, WORD_DIR)
+        self.letter_dir = os.path.join(base_dir, LETTER_DIR)
+        self.check_interval = check_interval
+        self.words = {}
+        self.letters = {}
+        # Bumped on every rescan that found a change, so caches of resolved
+        # sequences know when to drop their entries
+        self.generation = 0
+        self._mtimes = {}
+        self._last_check = 0.0
+        self._dirty = False
+        self._observer = None
+        self._lock = threading.Lock()
+        # seed: {"words", "letters", "mtimes"} saved by a previous run (see
+        # warm_cache.py); used instead of a scan while the folders are unchanged
+        if seed and seed.get("mtimes") == dataset_mtimes(base_dir):
+            self.words, self.letters = dict(seed["words"]), dict(seed["letters"])
+            self._mtimes = {self.word_dir: seed["mtimes"][WORD_DIR], self.letter_dir: seed["mtimes"][LETTER_DIR]}
+            self.generation = 1
+            self._last_check = time.monotonic()
+        else:
+            self.refresh(force=True)
+
+    @staticmethod
+    def _scan(directory):
+        entries = {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    name, ext = os.path.splitext(entry.name)
+                    if ext.lower() == VIDEO_EXT and entry.is_file():
+                        entries[name.lower()] = entry.path
+        except FileNotFoundError:
+            pass
+        return entries
+
+    @staticmethod
+    def _dir_mtime(directory):
+        try:
+            return os.stat(directory).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def refresh(self, force=False):
+        # Only directories whose mtime changed are rescanned.
+        with self._lock:
+            for attr, directory in (("words", self.word_dir), ("letters", self.letter_dir)):
+                mtime = self._dir_mtime(directory)
+                if force or self._mtimes.get(directory) != mtime:
+                    setattr(self, attr, self._scan(directory))
+                    self._mtimes[directory] = mtime
+                    self.generation += 1
+            self._dirty = False
+            self._last_check = time.monotonic()
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    def maybe_refresh(self):
+        # With a watchdog observer running, only its events trigger a rescan;
+        # otherwise the directory mtimes are polled at most every check_interval.
+        if self._dirty:
+            self.refresh()
+        elif self._observer is None and time.monotonic() - self._last_check >= self.check_interval:
+            self.refresh()
+
+    def watch(self):
+        if Observer is None or self._observer is not None:
+            return self._observer is not None
+        observer = Observer()
+        handler = _DirtyHandler(self)
+        for directory in (self.word_dir, self.letter_dir):
+            if os.path.isdir(directory):
+                observer.schedule(handler, directory, recursive=False)
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+        return True
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+
+    def snapshot(self):
+        with self._lock:
+            return {"words": dict(self.words), "letters": dict(self.letters),
+                    "mtimes": {WORD_DIR: self._mtimes.get(self.word_dir), LETTER_DIR: self._mtimes.get(self.letter_dir)}}
+
+    def word_video(self, word):
+        return self.words.get(word.lower())
+
+    def letter_video(self, letter):
+        return self.letters.get(letter.lower())
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(base_dir='datasets', seed=None):
+    with _indexes_lock:
+        index = _indexes.get(base_dir)
+        if index is None:
+            index = _indexes[base_dir] = VideoIndex(base_dir, seed=seed)
+    index.maybe_refresh()
+    return index
+
+
+def get_video_sequence(gloss_sentence, base_dir='datasets', partial_spelling=False):
+    # Word clip if one exists, otherwise fingerspell the word. With
+    # partial_spelling the letters that do exist are still played; without
+    # it a word with any unknown character is skipped entirely.
+    index = get_index(base_dir)
+    video_sequence = []
+
+    for word in gloss_sentence.lower().split():
+        word_video = index.word_video(word)
+        if word_video:
+            video_sequence.append(word_video)
+            continue
+        letters_found = []
+        for letter in word:
+            letter_video = index.letter_video(letter)
+            if letter_video:
+                letters_found.append(letter_video)
+            elif not partial_spelling:
+                letters_found = []
+                break
+        video_sequence.extend(letters_found)
+
+    return video_sequence
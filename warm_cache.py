@@ -0,0 +1,234 @@
+import argparse
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from video_index import dataset_mtimes, file_signature, get_index
+
+DEFAULT_DIR = os.environ.get("ISL_WARM_CACHE_DIR", os.path.join(".cache", "warm"))
+# Set to 1 to load the spaCy model on a background thread at startup instead
+# of on the first gloss that misses every cache
+PRELOAD_MODEL = os.environ.get("ISL_PRELOAD_MODEL") == "1"
+# Minimum seconds between automatic saves of the gloss memo
+SAVE_INTERVAL = 30.0
+FORMAT = 2
+
+
+def _write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"⚠ Ignoring warm cache file {path}: {e}")
+        return None
+
+
+def gloss_version():
+    # What a memoized gloss depends on: the model build and the gloss rules
+    from gloss_lexicon import model_version
+    from isl_gloss import KEEP_WORDS
+    from nlp_loader import MODEL_NAME
+
+    return {"format": FORMAT, "model": MODEL_NAME, "model_version": model_version(), "keep_words": sorted(KEEP_WORDS)}
+
+
+def _preload_model():
+    from nlp_loader import get_nlp
+
+    try:
+        get_nlp()
+    except OSError as e:
+        print(f"⚠ {e}")
+
+
+class WarmCache:
+    # State saved between runs under one directory, each file stamped with
+    # what it depends on and ignored when that no longer matches:
+    #   index.json    dataset index           (dataset folder mtimes)
+    #   gloss.json    gloss memo              (spaCy model version, gloss rules)
+    #   posters.npy   first frame per clip    (display tier)
+    #   posters.json  row of each clip in posters.npy (with the clip's mtime
+    #                 and size; a replaced clip's row is ignored)
+    # Translations already persist in their own sqlite file (translation.py);
+    # the manifest only records where it is. Posters are memory-mapped.
+    def __init__(self, directory=DEFAULT_DIR, base_dir='datasets'):
+        self.directory = directory
+        self.base_dir = base_dir
+        self.posters = None
+        self._poster_rows = {}
+        self._last_save = time.monotonic()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    # --- Dataset index ---
+    def load_index(self):
+        data = _read_json(self.path("index.json"))
+        if data and data.get("format") == FORMAT and data.get("base_dir") == self.base_dir:
+            return get_index(self.base_dir, seed=data)
+        return get_index(self.base_dir)
+
+    def save_index(self):
+        _write_json(self.path("index.json"), dict(get_index(self.base_dir).snapshot(), format=FORMAT,
+                                                  base_dir=self.base_dir))
+
+    # --- Gloss memo ---
+    def load_gloss(self, cache=None):
+        from gloss_cache import gloss_cache
+
+        cache = cache or gloss_cache
+        data = _read_json(self.path("gloss.json"))
+        if not data or data.get("version") != gloss_version():
+            return 0
+        for text, gloss in data["entries"]:
+            cache.put(text, gloss)
+        return len(data["entries"])
+
+    def save_gloss(self, cache=None):
+        from gloss_cache import gloss_cache
+
+        cache = cache or gloss_cache
+        _write_json(self.path("gloss.json"), {"version": gloss_version(), "entries": cache.items()})
+
+    # --- Posters ---
+    def load_posters(self, tier):
+        # True when every clip in the index has a current poster
+        meta = _read_json(self.path("posters.json"))
+        if not meta or meta.get("key") != {"format": FORMAT, "tier": list(tier)} or \
+                not os.path.exists(self.path("posters.npy")):
+            return False
+        self.posters = np.load(self.path("posters.npy"), mmap_mode="r")
+        self._poster_rows = {path: row for path, (row, source) in meta["rows"].items()
+                             if source == file_signature(path)}
+        index = get_index(self.base_dir)
+        return all(path in self._poster_rows for path in list(index.words.values()) + list(index.letters.values()))
+
+    def build_posters(self, tier, log=print):
+        # First frame of every clip at the display tier; one small read each
+        import cv2
+        from frame_cache import fit_frame
+
+        index = get_index(self.base_dir)
+        rows, frames = {}, []
+        for video_path in sorted(list(index.words.values()) + list(index.letters.values())):
+            source = file_signature(video_path)
+            cap = cv2.VideoCapture(video_path)
+            ok, frame = cap.read()
+            cap.release()
+            if ok:
+                rows[video_path] = [len(frames), source]
+                frames.append(fit_frame(frame, tier))
+        if not frames:
+            return False
+        tmp_path = self.path("posters.tmp.npy")
+        np.save(tmp_path, np.stack(frames))
+        os.replace(tmp_path, self.path("posters.npy"))
+        _write_json(self.path("posters.json"), {"key": {"format": FORMAT, "tier": list(tier)}, "rows": rows})
+        log(f"🖼 Saved {len(rows)} clip posters to {self.directory}")
+        return self.load_posters(tier)
+
+    def poster(self, video_path):
+        # First frame of the clip (display tier), or None if not cached
+        row = self._poster_rows.get(video_path)
+        return self.posters[row] if row is not None and self.posters is not None else None
+
+    # --- Saving ---
+    def save(self):
+        with self._lock:
+            self.save_index()
+            self.save_gloss()
+            from translation import DEFAULT_CACHE_PATH
+            _write_json(self.path("manifest.json"), {
+                "format": FORMAT,
+                "saved": time.time(),
+                "dataset": dataset_mtimes(self.base_dir),
+                "gloss": gloss_version(),
+                "translation_cache": os.path.abspath(DEFAULT_CACHE_PATH),
+            })
+            self._last_save = time.monotonic()
+
+    def maybe_save(self):
+        # For servers that are never shut down cleanly (Streamlit)
+        if time.monotonic() - self._last_save >= SAVE_INTERVAL:
+            threading.Thread(target=self.save, name="warm-cache-save", daemon=True).start()
+            self._last_save = time.monotonic()
+
+
+_warm = None
+_warm_lock = threading.Lock()
+
+
+def warm_start(base_dir='datasets', directory=DEFAULT_DIR, tier=None, posters=True, preload=PRELOAD_MODEL):
+    # Call once at the top of an entry point, before the video index is used.
+    # Seeds the index and gloss memo from the last run, maps the posters
+    # (front ends that show video) and optionally starts loading the model in
+    # the background; saves again at exit.
+    global _warm
+    with _warm_lock:
+        if _warm is not None:
+            return _warm
+        start = time.perf_counter()
+        warm = WarmCache(directory, base_dir)
+        warm.load_index()
+        glosses = warm.load_gloss()
+        if posters:
+            if tier is None:
+                from frame_cache import DEFAULT_TIER as tier
+            if not warm.load_posters(tier):
+                # Built in the background; clips without one just start without it
+                threading.Thread(target=warm.build_posters, args=(tier,), name="warm-posters", daemon=True).start()
+        if preload:
+            print("⏱ Loading the spaCy model in the background")
+            threading.Thread(target=_preload_model, name="nlp-preload", daemon=True).start()
+        atexit.register(warm.save)
+        print(f"♨ Warm start from {directory}: {glosses} glosses, "
+              f"{len(warm._poster_rows)} posters in {time.perf_counter() - start:.2f}s")
+        _warm = warm
+        return warm
+
+
+def main(argv=None):
+    from frame_cache import DEFAULT_TIER
+
+    parser = argparse.ArgumentParser(prog="python -m warm_cache", description="Prepare or inspect the warm-start cache.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("build", "write the index and clip posters"), ("info", "show what is cached")):
+        command = sub.add_parser(name, help=help_text)
+        command.add_argument("--base-dir", default="datasets")
+        command.add_argument("--dir", default=DEFAULT_DIR)
+    args = parser.parse_args(argv)
+
+    warm = WarmCache(args.dir, args.base_dir)
+    if args.command == "build":
+        warm.load_index()
+        warm.build_posters(DEFAULT_TIER)
+        warm.save()
+        return 0
+    manifest = _read_json(warm.path("manifest.json")) or {}
+    print(f"📁 {args.dir}")
+    print(f"  saved: {time.ctime(manifest['saved']) if 'saved' in manifest else 'never'}")
+    print(f"  dataset unchanged: {manifest.get('dataset') == dataset_mtimes(args.base_dir)}")
+    print(f"  gloss memo valid: {manifest.get('gloss') == gloss_version()}")
+    print(f"  posters valid: {warm.load_posters(DEFAULT_TIER)} ({len(warm._poster_rows)} clips)")
+    print(f"  translation cache: {manifest.get('translation_cache', '-')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())